@@ -8,6 +8,7 @@ import numpy as np
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional
 from models import db, AIAnalysis, User, FamilyMember
+from redis_cache import invalidate_family_dashboard
 
 class EyeDiseaseInfo:
     """Comprehensive eye disease information database"""
@@ -320,6 +321,8 @@ class AIEyeDiseaseDetector:
             
             db.session.add(ai_analysis)
             db.session.commit()
+            if family_member_id:
+                invalidate_family_dashboard(user_id)
             
         except Exception as e:
             print(f"Error saving analysis to database: {e}")
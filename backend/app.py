@@ -10,7 +10,8 @@ from flask_sqlalchemy import SQLAlchemy
 from models import db, User, TestResult, UserRole, FamilyMember, AIAnalysis, DoctorProfile, Appointment, Prescription, DoctorReview, Message, VisionTest
 from auth_routes import auth_bp
 from ai_routes import ai_bp
-from email_service import init_mail, send_test_results_email, send_welcome_email, send_comprehensive_report
+from email_service import init_mail, queue_test_results_email, queue_welcome_email, queue_comprehensive_report
+from json_provider import OrjsonProvider
 # Temporarily disabled due to numpy/opencv compatibility issue
 # from explainable_ai import GradCAMExplainer, generate_multi_class_explanation, generate_medical_interpretation
 explainable_ai_enabled = False
@@ -74,6 +75,7 @@ load_dotenv()
 warnings.filterwarnings('ignore')
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 
 # Configuration
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-change-in-production')
@@ -658,20 +660,20 @@ def predict():
                     print(f"✅ Demo test result saved for user {current_user_id}")
                     response['saved_to_history'] = True
                     
-                    # Send email notification if user has email
+                    # Queue email notification if user has email
                     if user and user.email:
-                        email_sent = send_test_results_email(
+                        email_queued = queue_test_results_email(
                             mail, 
                             user.email, 
                             f"{user.first_name} {user.last_name}", 
                             'eye_disease', 
                             response
                         )
-                        response['email_sent'] = email_sent
-                        if email_sent:
-                            print(f"✅ Demo test results emailed to {user.email}")
+                        response['email_queued'] = email_queued
+                        if email_queued:
+                            print(f"✅ Demo test results email queued for {user.email}")
                         else:
-                            print(f"⚠️ Failed to send demo email to {user.email}")
+                            print(f"⚠️ Failed to queue demo email to {user.email}")
                     
                 except Exception as e:
                     print(f"⚠️ Failed to save demo test result: {str(e)}")
@@ -841,20 +843,20 @@ def predict():
                         print(f"✅ Test result saved for user {current_user_id}")
                         response['saved_to_history'] = True
                         
-                        # Send email notification if user has email
+                        # Queue email notification if user has email
                         if user and user.email:
-                            email_sent = send_test_results_email(
+                            email_queued = queue_test_results_email(
                                 mail, 
                                 user.email, 
                                 f"{user.first_name} {user.last_name}", 
                                 'eye_disease', 
                                 response
                             )
-                            response['email_sent'] = email_sent
-                            if email_sent:
-                                print(f"✅ Test results emailed to {user.email}")
+                            response['email_queued'] = email_queued
+                            if email_queued:
+                                print(f"✅ Test results email queued for {user.email}")
                             else:
-                                print(f"⚠️ Failed to send email to {user.email}")
+                                print(f"⚠️ Failed to queue email to {user.email}")
                         
                     except Exception as e:
                         print(f"⚠️ Failed to save test result: {str(e)}")
@@ -915,20 +917,20 @@ def predict():
                 print(f"✅ Demo test result saved for user {current_user_id}")
                 response['saved_to_history'] = True
                 
-                # Send email notification if user has email
+                # Queue email notification if user has email
                 if user and user.email:
-                    email_sent = send_test_results_email(
+                    email_queued = queue_test_results_email(
                         mail, 
                         user.email, 
                         f"{user.first_name} {user.last_name}", 
                         'eye_disease', 
                         response
                     )
-                    response['email_sent'] = email_sent
-                    if email_sent:
-                        print(f"✅ Demo test results emailed to {user.email}")
+                    response['email_queued'] = email_queued
+                    if email_queued:
+                        print(f"✅ Demo test results email queued for {user.email}")
                     else:
-                        print(f"⚠️ Failed to send demo email to {user.email}")
+                        print(f"⚠️ Failed to queue demo email to {user.email}")
                 
             except Exception as e:
                 print(f"⚠️ Failed to save demo test result: {str(e)}")
@@ -1039,20 +1041,20 @@ def analyze_refractive_power():
                     print(f"✅ Refractive power result saved for user {current_user_id}")
                     response['saved_to_history'] = True
 
-                    # Send email notification if user has email
+                    # Queue email notification if user has email
                     if user and user.email:
-                        email_sent = send_test_results_email(
+                        email_queued = queue_test_results_email(
                             mail,
                             user.email,
                             f"{user.first_name} {user.last_name}",
                             'refractive_power',
                             response
                         )
-                        response['email_sent'] = email_sent
-                        if email_sent:
-                            print(f"✅ Refractive power results emailed to {user.email}")
+                        response['email_queued'] = email_queued
+                        if email_queued:
+                            print(f"✅ Refractive power results email queued for {user.email}")
                         else:
-                            print(f"⚠️ Failed to send email to {user.email}")
+                            print(f"⚠️ Failed to queue email to {user.email}")
 
                 except Exception as e:
                     print(f"⚠️ Failed to save refractive power result: {str(e)}")
@@ -1201,7 +1203,7 @@ def ishihara_color_test():
         results = analyze_color_vision(user_answers)
         
         # Save result for authenticated user
-        email_sent = False
+        email_queued = False
         if current_user_id:
             try:
                 user = User.query.get(current_user_id)
@@ -1231,17 +1233,17 @@ def ishihara_color_test():
                         'new_balance': reward_result.get('new_balance', 0)
                     }
 
-                # Send email notification if user has email
+                # Queue email notification if user has email
                 if user and user.email:
-                    email_sent = send_test_results_email(
+                    email_queued = queue_test_results_email(
                         mail, 
                         user.email, 
                         f"{user.first_name} {user.last_name}", 
                         'color_blindness', 
                         results
                     )
-                    if email_sent:
-                        print(f"✅ Color test results emailed to {user.email}")
+                    if email_queued:
+                        print(f"✅ Color test results email queued for {user.email}")
             except Exception as e:
                 print(f"❌ Error saving Ishihara test result: {str(e)}")
                 db.session.rollback()
@@ -1445,8 +1447,8 @@ def send_email_report():
         if not test_result:
             return jsonify({'error': 'Test result not found or access denied'}), 404
             
-        # Send email based on test type
-        email_sent = send_test_results_email(
+        # Queue email based on test type
+        email_queued = queue_test_results_email(
             mail,
             user.email,
             f"{user.first_name} {user.last_name}",
@@ -1454,16 +1456,16 @@ def send_email_report():
             test_result.results
         )
         
-        # Check if email was sent successfully
-        if email_sent:
+        # Delivery happens in the background, so report that it was queued
+        if email_queued:
             return jsonify({
-                'message': 'Report sent successfully',
+                'message': 'Report queued for delivery',
                 'email': user.email,
                 'test_type': test_result.test_type,
                 'sent_at': datetime.now().isoformat()
             }), 200
         else:
-            return jsonify({'error': 'Failed to send email report'}), 500
+            return jsonify({'error': 'Failed to queue email report'}), 500
             
     except Exception as e:
         print(f"❌ Error sending email report: {str(e)}")
@@ -1489,21 +1491,21 @@ def send_all_reports():
         if not test_results:
             return jsonify({'error': 'No test results found'}), 404
             
-        # Send comprehensive report
-        email_sent = send_comprehensive_report(mail, user, test_results)
+        # Queue comprehensive report
+        email_queued = queue_comprehensive_report(mail, user, test_results)
         
-        # Check if email was sent successfully
-        if email_sent:
+        # Delivery happens in the background, so report that it was queued
+        if email_queued:
             return jsonify({
-                'message': 'Comprehensive report sent successfully',
+                'message': 'Comprehensive report queued for delivery',
                 'email': user.email,
                 'total_tests': len(test_results),
                 'sent_at': datetime.now().isoformat()
             }), 200
         else:
             return jsonify({
-                'error': 'Failed to send comprehensive report',
-                'reason': 'Email service could not deliver the report'
+                'error': 'Failed to queue comprehensive report',
+                'reason': 'Email service could not queue the report'
             }), 500
             
     except Exception as e:
@@ -117,7 +117,8 @@ def login():
         if not user.is_active:
             return jsonify({'error': 'Account is deactivated'}), 401
         
-        # Update last login
+        # Update last login; the same commit saves the argon2id hash that
+        # check_password swaps in for a legacy or outdated one
         user.last_login = datetime.utcnow()
         db.session.commit()
         
@@ -6,44 +6,104 @@ Handles encryption, key management, and security utilities
 import os
 import hashlib
 import secrets
+import tempfile
 import base64
+import logging
+import functools
 from typing import Dict, Any, Optional, Tuple
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-from cryptography.hazmat.primitives.asymmetric import rsa, padding
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from cryptography.hazmat.primitives.asymmetric import rsa, padding, ed25519, x25519
+from cryptography.hazmat.primitives.ciphers.aead import ChaCha20Poly1305
 from cryptography.hazmat.backends import default_backend
 import jwt
 from datetime import datetime, timedelta
 import bcrypt
 
+logger = logging.getLogger(__name__)
+
+MASTER_KEY_FILE = os.path.join(os.path.dirname(__file__), '.master_key')
+
+# Overwrite buffer size for secure_delete_file
+SECURE_DELETE_CHUNK_SIZE = 1 << 20  # 1 MiB
+
+# Bitcoin address prefixes mapped to their allowed length range
+_BTC_LEGACY_PREFIXES = ('1', '3')
+_BTC_BECH32_PREFIXES = ('bc1', 'tb1')
+_BTC_LEGACY_LENGTHS = (25, 34)
+_BTC_BECH32_LENGTHS = (42, 62)
+
+# HKDF context for X25519 sealed-box encryption
+_X25519_HKDF_INFO = b'dristi-x25519-chacha20poly1305'
+_X25519_PUBLIC_KEY_SIZE = 32
+_CHACHA_NONCE_SIZE = 12
+
+def _read_key_file(path: str) -> bytes:
+    """Read a key file without going through buffered file objects"""
+    fd = os.open(path, os.O_RDONLY | os.O_CLOEXEC)
+    try:
+        chunks = []
+        while True:
+            chunk = os.read(fd, 4096)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return b''.join(chunks)
+    finally:
+        os.close(fd)
+
+def _write_all(fd: int, data: bytes):
+    """Write all of data to fd, retrying after short writes"""
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+@functools.lru_cache(maxsize=1)
+def _load_master_key() -> bytes:
+    """Load the master key once per process, creating it if missing"""
+    try:
+        return _read_key_file(MASTER_KEY_FILE)
+    except FileNotFoundError:
+        pass
+    
+    # Write the whole key to a private temp file before it becomes visible,
+    # so another worker can never read a partially written key
+    key = Fernet.generate_key()
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(MASTER_KEY_FILE), prefix='.master_key.')
+    try:
+        try:
+            _write_all(fd, key)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        # link fails if the key exists, so the first worker to publish wins
+        os.link(tmp_path, MASTER_KEY_FILE)
+    except FileExistsError:
+        return _read_key_file(MASTER_KEY_FILE)
+    finally:
+        os.unlink(tmp_path)
+    return key
+
 class SecurityService:
     """Service for handling security operations"""
     
     def __init__(self):
         """Initialize security service"""
         self.backend = default_backend()
-        self.jwt_secret = os.getenv('JWT_SECRET_KEY', self._generate_secret())
+        self.jwt_secret = os.getenv('JWT_SECRET_KEY') or self._generate_secret()
         self.encryption_key = self._get_or_create_master_key()
         
     def _generate_secret(self) -> str:
         """Generate a secure random secret"""
+        logger.warning("JWT_SECRET_KEY is not set; using a random per-process secret")
         return secrets.token_urlsafe(32)
     
     def _get_or_create_master_key(self) -> bytes:
         """Get or create master encryption key"""
-        key_file = os.path.join(os.path.dirname(__file__), '.master_key')
-        
-        if os.path.exists(key_file):
-            with open(key_file, 'rb') as f:
-                return f.read()
-        else:
-            key = Fernet.generate_key()
-            with open(key_file, 'wb') as f:
-                f.write(key)
-            # Set restrictive permissions
-            os.chmod(key_file, 0o600)
-            return key
+        return _load_master_key()
     
     def derive_key_from_password(self, password: str, salt: bytes) -> bytes:
         """
@@ -209,6 +269,9 @@ class SecurityService:
         """
         Generate RSA key pair for asymmetric encryption
         
+        Deprecated: kept for existing keys, use generate_x25519_keypair
+        for encryption and generate_ed25519_keypair for signing.
+        
         Returns:
             Tuple of (private_key_pem, public_key_pem)
         """
@@ -236,6 +299,8 @@ class SecurityService:
         """
         Encrypt data with RSA public key
         
+        Deprecated: kept for existing keys, use x25519_encrypt.
+        
         Args:
             data: Data to encrypt
             public_key_pem: Public key in PEM format
@@ -263,6 +328,8 @@ class SecurityService:
         """
         Decrypt data with RSA private key
         
+        Deprecated: kept for existing keys, use x25519_decrypt.
+        
         Args:
             encrypted_data: Base64 encoded encrypted data
             private_key_pem: Private key in PEM format
@@ -289,6 +356,108 @@ class SecurityService:
         
         return decrypted.decode()
     
+    def _serialize_keypair(self, private_key, public_key) -> Tuple[str, str]:
+        """Serialize a private/public key pair to PEM strings"""
+        private_pem = private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption()
+        )
+        public_pem = public_key.public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        return private_pem.decode(), public_pem.decode()
+    
+    def generate_ed25519_keypair(self) -> Tuple[str, str]:
+        """
+        Generate Ed25519 key pair for signing
+        
+        Returns:
+            Tuple of (private_key_pem, public_key_pem)
+        """
+        private_key = ed25519.Ed25519PrivateKey.generate()
+        return self._serialize_keypair(private_key, private_key.public_key())
+    
+    def generate_x25519_keypair(self) -> Tuple[str, str]:
+        """
+        Generate X25519 key pair for asymmetric encryption
+        
+        Returns:
+            Tuple of (private_key_pem, public_key_pem)
+        """
+        private_key = x25519.X25519PrivateKey.generate()
+        return self._serialize_keypair(private_key, private_key.public_key())
+    
+    def _derive_x25519_key(self, shared_secret: bytes, ephemeral_public: bytes) -> bytes:
+        """Derive a ChaCha20-Poly1305 key from an X25519 shared secret"""
+        return HKDF(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=ephemeral_public,
+            info=_X25519_HKDF_INFO,
+        ).derive(shared_secret)
+    
+    def x25519_encrypt(self, data: str, public_key_pem: str) -> str:
+        """
+        Encrypt data for an X25519 public key
+        
+        Uses an ephemeral X25519 key exchange, HKDF-SHA256 and
+        ChaCha20-Poly1305.
+        
+        Args:
+            data: Data to encrypt
+            public_key_pem: Recipient X25519 public key in PEM format
+            
+        Returns:
+            Base64 encoded ephemeral public key, nonce and ciphertext
+        """
+        peer_public_key = serialization.load_pem_public_key(public_key_pem.encode())
+        if not isinstance(peer_public_key, x25519.X25519PublicKey):
+            raise ValueError("Public key is not an X25519 key")
+        
+        ephemeral_key = x25519.X25519PrivateKey.generate()
+        ephemeral_public = ephemeral_key.public_key().public_bytes(
+            encoding=serialization.Encoding.Raw,
+            format=serialization.PublicFormat.Raw
+        )
+        key = self._derive_x25519_key(ephemeral_key.exchange(peer_public_key), ephemeral_public)
+        
+        nonce = os.urandom(_CHACHA_NONCE_SIZE)
+        ciphertext = ChaCha20Poly1305(key).encrypt(nonce, data.encode(), None)
+        
+        return base64.b64encode(ephemeral_public + nonce + ciphertext).decode()
+    
+    def x25519_decrypt(self, encrypted_data: str, private_key_pem: str) -> str:
+        """
+        Decrypt data produced by x25519_encrypt
+        
+        Args:
+            encrypted_data: Base64 encoded encrypted data
+            private_key_pem: Recipient X25519 private key in PEM format
+            
+        Returns:
+            Decrypted data
+        """
+        private_key = serialization.load_pem_private_key(
+            private_key_pem.encode(),
+            password=None
+        )
+        if not isinstance(private_key, x25519.X25519PrivateKey):
+            raise ValueError("Private key is not an X25519 key")
+        
+        payload = base64.b64decode(encrypted_data)
+        ephemeral_public = payload[:_X25519_PUBLIC_KEY_SIZE]
+        nonce = payload[_X25519_PUBLIC_KEY_SIZE:_X25519_PUBLIC_KEY_SIZE + _CHACHA_NONCE_SIZE]
+        ciphertext = payload[_X25519_PUBLIC_KEY_SIZE + _CHACHA_NONCE_SIZE:]
+        
+        shared_secret = private_key.exchange(
+            x25519.X25519PublicKey.from_public_bytes(ephemeral_public)
+        )
+        key = self._derive_x25519_key(shared_secret, ephemeral_public)
+        
+        return ChaCha20Poly1305(key).decrypt(nonce, ciphertext, None).decode()
+    
     def create_data_hash(self, data: str) -> str:
         """
         Create SHA-256 hash of data
@@ -330,12 +499,22 @@ class SecurityService:
                 # Get file size
                 file_size = os.path.getsize(file_path)
                 
-                # Overwrite with random data multiple times
-                with open(file_path, 'r+b') as f:
+                # Overwrite with random data multiple times, streaming
+                # fixed-size chunks so memory use does not grow with the file
+                buffer = bytearray(SECURE_DELETE_CHUNK_SIZE)
+                view = memoryview(buffer)
+                with open(file_path, 'r+b', buffering=0) as f:
                     for _ in range(3):
                         f.seek(0)
-                        f.write(os.urandom(file_size))
-                        f.flush()
+                        remaining = file_size
+                        while remaining:
+                            size = min(SECURE_DELETE_CHUNK_SIZE, remaining)
+                            buffer[:size] = os.urandom(size)
+                            # Unbuffered writes can be short; finish the chunk
+                            written = 0
+                            while written < size:
+                                written += f.write(view[written:size])
+                            remaining -= size
                         os.fsync(f.fileno())
                 
                 # Finally delete the file
@@ -378,14 +557,15 @@ class SecurityService:
             True if valid format
         """
         # Legacy addresses
-        if address.startswith('1') or address.startswith('3'):
-            return 25 <= len(address) <= 34
-        
+        if address.startswith(_BTC_LEGACY_PREFIXES):
+            low, high = _BTC_LEGACY_LENGTHS
         # Bech32 addresses
-        if address.startswith('bc1') or address.startswith('tb1'):
-            return 42 <= len(address) <= 62
+        elif address.startswith(_BTC_BECH32_PREFIXES):
+            low, high = _BTC_BECH32_LENGTHS
+        else:
+            return False
         
-        return False
+        return low <= len(address) <= high
 
 # Global security service instance
 security_service = SecurityService()
@@ -7,17 +7,53 @@ import os
 import json
 import hashlib
 import secrets
+import binascii
 from typing import Dict, Any, Optional, Tuple, List
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 import base64
+import time
+import threading
+# Shared Web3 service for balance reads and signing services for sends; the
+# module also picks the eth_keys signing backend, so it goes before eth_account
+from .web3_service import Web3Service, get_web3_service
 from eth_account import Account
 from models import db, User, Wallet, BlockchainTransaction
 from .security_service import get_security_service
 import requests
 from datetime import datetime
 
+# Signing Web3Service instances are reused for a short window so that
+# repeated sends from the same wallet skip provider/contract setup
+SIGNER_CACHE_TTL = 60  # seconds
+SIGNER_CACHE_SIZE = 128
+
+_signer_cache: Dict[bytes, Tuple[float, Web3Service]] = {}
+_signer_cache_lock = threading.Lock()
+
+def _get_signing_service(private_key: str) -> Web3Service:
+    """Get a cached Web3Service for the given private key"""
+    # Key the cache on a digest so the raw key is never used as a dict key
+    cache_key = hashlib.sha256(private_key.encode()).digest()
+    now = time.monotonic()
+
+    with _signer_cache_lock:
+        entry = _signer_cache.get(cache_key)
+        if entry and now - entry[0] < SIGNER_CACHE_TTL:
+            return entry[1]
+
+        # Drop expired entries, then the oldest one if still full
+        for key in [k for k, (ts, _) in _signer_cache.items() if now - ts >= SIGNER_CACHE_TTL]:
+            del _signer_cache[key]
+        if len(_signer_cache) >= SIGNER_CACHE_SIZE:
+            oldest = min(_signer_cache, key=lambda k: _signer_cache[k][0])
+            del _signer_cache[oldest]
+
+        service = Web3Service(private_key=private_key)
+        _signer_cache[cache_key] = (now, service)
+        return service
+
 class WalletService:
     """Service for managing crypto wallets and transactions"""
     
@@ -74,7 +110,7 @@ class WalletService:
             eth_private_key = eth_account.key.hex()
             
             # Generate Bitcoin wallet (simplified - using random private key)
-            btc_private_key = secrets.token_hex(32)
+            btc_private_key = secrets.token_bytes(32)
             # For production, use proper Bitcoin key derivation
             btc_address = self._generate_btc_address(btc_private_key)
             
@@ -84,7 +120,8 @@ class WalletService:
             fernet = Fernet(encryption_key)
             
             encrypted_eth_key = fernet.encrypt(eth_private_key.encode()).decode()
-            encrypted_btc_key = fernet.encrypt(btc_private_key.encode()).decode()
+            # Stored hex-encoded so send_btc can keep decoding it as text
+            encrypted_btc_key = fernet.encrypt(binascii.hexlify(btc_private_key)).decode()
             
             # Store wallet data
             wallet_data = {
@@ -109,14 +146,16 @@ class WalletService:
         except Exception as e:
             raise Exception(f"Failed to create wallet: {str(e)}")
     
-    def _generate_btc_address(self, private_key: str) -> str:
+    def _generate_btc_address(self, private_key: bytes) -> str:
         """
         Generate Bitcoin address from private key (simplified)
         In production, use proper Bitcoin libraries like bitcoinlib
         """
         # This is a simplified implementation
-        # For production, use proper Bitcoin address generation
-        hash_obj = hashlib.sha256(private_key.encode())
+        # For production, derive the public key and use HASH160
+        # (SHA-256 then hashlib.new('ripemd160')) with base58/bech32 encoding
+        # Hash the 32 raw key bytes rather than a hex string
+        hash_obj = hashlib.sha256(private_key)
         return f"tb1{hash_obj.hexdigest()[:30]}"  # Testnet address format
     
     def _save_wallet_to_db(self, wallet_data: Dict[str, Any]):
@@ -196,7 +235,6 @@ class WalletService:
             ETH balance
         """
         try:
-            from .web3_service import get_web3_service
             web3_service = get_web3_service()
             return web3_service.get_balance(address)
         except Exception as e:
@@ -214,7 +252,6 @@ class WalletService:
             Token balance
         """
         try:
-            from .web3_service import get_web3_service
             web3_service = get_web3_service()
             
             contract_name = 'DRSTCoin' if token_type == 'DRST' else 'VisionCoin'
@@ -276,8 +313,7 @@ class WalletService:
             private_key = fernet.decrypt(wallet_data['encrypted_eth_key'].encode()).decode()
             
             # Send transaction
-            from .web3_service import Web3Service
-            web3_service = Web3Service(private_key=private_key)
+            web3_service = _get_signing_service(private_key)
             return web3_service.send_transaction(to_address, amount)
             
         except Exception as e:
@@ -312,8 +348,7 @@ class WalletService:
             private_key = fernet.decrypt(wallet_data['encrypted_eth_key'].encode()).decode()
             
             # Send token transaction
-            from .web3_service import Web3Service
-            web3_service = Web3Service(private_key=private_key)
+            web3_service = _get_signing_service(private_key)
             contract_name = 'DRSTCoin' if token_type == 'DRST' else 'VisionCoin'
             return web3_service.send_token(contract_name, to_address, amount)
             
@@ -5,14 +5,176 @@ Handles smart contract interactions and Ethereum transactions
 
 import json
 import os
+import asyncio
+import logging
+import functools
+import time
+import threading
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Dict, Any, List, Optional, Tuple
-from web3 import Web3
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    # Fallback when the orjson C extension is unavailable
+    _json_loads = json.loads
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+
+# Sign with libsecp256k1 via coincurve when it is installed; this must be
+# set before eth_keys is first imported to take effect
+if importlib.util.find_spec('coincurve') is not None:
+    os.environ.setdefault('ECKEYS_BACKEND_CLASS', 'eth_keys.backends.CoinCurveECCBackend')
+
+from web3 import Web3, AsyncWeb3, AsyncHTTPProvider
+from web3.exceptions import Web3Exception
+from eth_abi import decode as abi_decode
+from eth_utils.abi import collapse_if_tuple
+from web3._utils.abi import map_abi_data
+from web3._utils.normalizers import BASE_RETURN_NORMALIZERS
 # Skip middleware for now - not needed for local development
 from eth_account import Account
 from cryptography.fernet import Fernet
 import hashlib
 from datetime import datetime
 
+DEPLOYMENT_FILE = os.path.join(os.path.dirname(__file__),
+                               '../../blockchain/deployments/goerli.json')
+ABI_DIR = os.path.join(os.path.dirname(__file__), '../../blockchain/abis')
+CONTRACT_NAMES = ['DigitalHealthPassport', 'DRSTCoin', 'VisionCoin', 'AchievementNFT']
+
+logger = logging.getLogger(__name__)
+
+# Errors a node, contract call or bad input can raise; web3.py reports
+# JSON-RPC errors and invalid addresses as ValueError, a contract that
+# failed to load surfaces as a KeyError, and eth_account rejects keys and
+# addresses of the wrong type with TypeError. The sync provider fails with
+# requests errors, the async provider with aiohttp errors and timeouts
+BLOCKCHAIN_ERRORS = (Web3Exception, ValueError, KeyError, TypeError,
+                     requests.RequestException, aiohttp.ClientError,
+                     asyncio.TimeoutError, TimeoutError)
+
+WEI_PER_ETHER = 10 ** 18
+RPC_TIMEOUT = 10  # seconds
+FEE_TTL = 2.0  # seconds; base fee only moves once per block
+PRIORITY_FEE_WEI = int(float(os.getenv('PRIORITY_FEE_GWEI', '1.5')) * 10 ** 9)
+
+def _create_rpc_session() -> requests.Session:
+    """Create a keep-alive session with a connection pool for RPC calls"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=32,
+        max_retries=Retry(total=3, backoff_factor=0.1)
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+# Shared by every Web3Service so TCP/TLS connections are reused
+_rpc_session = _create_rpc_session()
+
+# Response keys for HealthRecord structs, in struct field order
+HEALTH_RECORD_FIELDS = ('recordId', 'patientAddress', 'ipfsHash',
+                        'timestamp', 'recordType', 'isActive')
+# Response keys for a token ID followed by its Achievement struct fields
+NFT_FIELDS = ('tokenId', 'achievementType', 'name', 'description',
+              'imageURI', 'mintedAt', 'recipient')
+
+# DRSTCoin reward function for each activity type
+ACTIVITY_REWARD_FUNCTIONS = {
+    'eye_test': 'rewardEyeTest',
+    'daily_exercise': 'rewardDailyExercise',
+    'family_member': 'rewardFamilyMember',
+}
+
+# DRSTCoin.Activity enum value for each activity type, used by batchReward
+ACTIVITY_IDS = {
+    'eye_test': 0,
+    'daily_exercise': 1,
+    'family_member': 2,
+}
+BATCH_REWARD_BASE_GAS = 50000
+BATCH_REWARD_GAS_PER_USER = 90000
+
+# Multicall3 is deployed at the same address on mainnet and public testnets
+MULTICALL3_ADDRESS = '0xcA11bde05977b3631167028862bE2a173976CA11'
+MULTICALL3_ABI = [{
+    'inputs': [{
+        'components': [
+            {'internalType': 'address', 'name': 'target', 'type': 'address'},
+            {'internalType': 'bytes', 'name': 'callData', 'type': 'bytes'},
+        ],
+        'internalType': 'struct Multicall3.Call[]',
+        'name': 'calls',
+        'type': 'tuple[]',
+    }],
+    'name': 'aggregate',
+    'outputs': [
+        {'internalType': 'uint256', 'name': 'blockNumber', 'type': 'uint256'},
+        {'internalType': 'bytes[]', 'name': 'returnData', 'type': 'bytes[]'},
+    ],
+    'stateMutability': 'payable',
+    'type': 'function',
+}]
+
+# Deployment data and ABIs are parsed once per process and shared by
+# every Web3Service instance
+
+@functools.lru_cache(maxsize=1)
+def _load_deployment() -> dict:
+    """Load parsed deployment data"""
+    if not os.path.exists(DEPLOYMENT_FILE):
+        return {}
+    with open(DEPLOYMENT_FILE, 'rb') as f:
+        return _json_loads(f.read())
+
+@functools.lru_cache(maxsize=None)
+def _load_abi_file(abi_file: str) -> Optional[tuple]:
+    """Load a parsed ABI file as an immutable tuple"""
+    if not os.path.exists(abi_file):
+        return None
+    with open(abi_file, 'rb') as f:
+        return tuple(_json_loads(f.read()))
+
+@functools.lru_cache(maxsize=4096)
+def _cs(address: str) -> str:
+    """Checksum an address, memoizing the keccak work per distinct input"""
+    return Web3.to_checksum_address(address)
+
+def _get_abi(contract_name: str) -> Optional[tuple]:
+    """Get the parsed ABI for a contract"""
+    return _load_abi_file(os.path.join(ABI_DIR, f'{contract_name}.json'))
+
+@functools.lru_cache(maxsize=1)
+def _load_all_abis() -> Tuple[dict, Dict[str, Optional[tuple]]]:
+    """
+    Read the deployment file and every contract ABI concurrently
+    Cached, so only the first Web3Service in a process starts the thread pool
+    
+    Returns:
+        Tuple of (deployment data, ABI by contract name)
+    """
+    with ThreadPoolExecutor(max_workers=len(CONTRACT_NAMES) + 1) as executor:
+        deployment_future = executor.submit(_load_deployment)
+        abis = dict(zip(CONTRACT_NAMES, executor.map(_get_abi, CONTRACT_NAMES)))
+        return deployment_future.result(), abis
+
+def _next_base_fee(fee_history) -> Optional[int]:
+    """Get the next block's base fee from an eth_feeHistory result"""
+    base_fees = fee_history.get('baseFeePerGas') or []
+    if not base_fees:
+        return None
+    base_fee = base_fees[-1]
+    return int(base_fee, 16) if isinstance(base_fee, str) else int(base_fee)
+
 class Web3Service:
     """Service for interacting with Ethereum blockchain and smart contracts"""
     
@@ -26,7 +188,13 @@ class Web3Service:
         """
         # Default to local Hardhat node or Infura
         self.provider_url = provider_url or os.getenv('ETHEREUM_RPC_URL', 'http://127.0.0.1:8545')
-        self.w3 = Web3(Web3.HTTPProvider(self.provider_url))
+        self.w3 = Web3(Web3.HTTPProvider(
+            self.provider_url,
+            session=_rpc_session,
+            request_kwargs={'timeout': RPC_TIMEOUT}
+        ))
+        # Async client for read-only calls that can run concurrently
+        self.aio_w3 = AsyncWeb3(AsyncHTTPProvider(self.provider_url))
         
         # Skip PoA middleware for local development
         # if 'goerli' in self.provider_url or 'sepolia' in self.provider_url:
@@ -42,6 +210,22 @@ class Web3Service:
         # Contract addresses (will be loaded from deployment)
         self.contract_addresses = {}
         self.contracts = {}
+        self.async_contracts = {}
+        # Contract function callables by contract name, bound at load time
+        self.functions = {}
+        
+        # Next nonce to use, seeded from the node on first send
+        self._next_nonce = None
+        self._nonce_lock = threading.Lock()
+        
+        # (fetched_at, fee_fields) of the last fee lookup
+        self._fee_cache = (0.0, {})
+        self._tip = PRIORITY_FEE_WEI
+        self._chain_id = None
+        
+        # Multicall3 aggregator, checked for on first use
+        self.multicall = self.w3.eth.contract(address=MULTICALL3_ADDRESS, abi=MULTICALL3_ABI)
+        self._multicall_available = None
         
         # Load contract ABIs and addresses
         self._load_contracts()
@@ -49,32 +233,32 @@ class Web3Service:
     def _load_contracts(self):
         """Load contract ABIs and addresses from deployment files"""
         try:
+            deployment_data, abis = _load_all_abis()
+            
             # Load contract addresses from deployment file
-            deployment_file = os.path.join(os.path.dirname(__file__), 
-                                         '../../blockchain/deployments/goerli.json')
-            if os.path.exists(deployment_file):
-                with open(deployment_file, 'r') as f:
-                    deployment_data = json.load(f)
-                    self.contract_addresses = {
-                        name: data['address'] 
-                        for name, data in deployment_data['contracts'].items()
-                    }
+            if deployment_data:
+                self.contract_addresses = {
+                    name: _cs(data['address'])
+                    for name, data in deployment_data['contracts'].items()
+                }
             
             # Load contract ABIs
-            abi_dir = os.path.join(os.path.dirname(__file__), '../../blockchain/abis')
-            contract_names = ['DigitalHealthPassport', 'DRSTCoin', 'VisionCoin', 'AchievementNFT']
-            
-            for contract_name in contract_names:
-                abi_file = os.path.join(abi_dir, f'{contract_name}.json')
-                if os.path.exists(abi_file):
-                    with open(abi_file, 'r') as f:
-                        abi = json.load(f)
-                        
-                    if contract_name in self.contract_addresses:
-                        self.contracts[contract_name] = self.w3.eth.contract(
-                            address=self.contract_addresses[contract_name],
-                            abi=abi
-                        )
+            for contract_name, abi in abis.items():
+                if abi is not None and contract_name in self.contract_addresses:
+                    abi = list(abi)
+                    contract = self.w3.eth.contract(
+                        address=self.contract_addresses[contract_name],
+                        abi=abi
+                    )
+                    self.contracts[contract_name] = contract
+                    self.functions[contract_name] = {
+                        item['name']: getattr(contract.functions, item['name'])
+                        for item in abi if item.get('type') == 'function'
+                    }
+                    self.async_contracts[contract_name] = self.aio_w3.eth.contract(
+                        address=self.contract_addresses[contract_name],
+                        abi=abi
+                    )
                         
         except Exception as e:
             print(f"Warning: Could not load contracts: {str(e)}")
@@ -86,6 +270,177 @@ class Web3Service:
         except:
             return False
     
+    def _fetch_base_fee_and_nonce(self) -> Tuple[Optional[int], int]:
+        """
+        Fetch the next base fee and nonce in a single batched JSON-RPC request
+        
+        Returns:
+            Tuple of (base_fee, nonce); base_fee is None before London or when
+            the node does not implement eth_feeHistory
+        """
+        payload = [
+            {'jsonrpc': '2.0', 'method': 'eth_feeHistory', 'params': [1, 'latest', []], 'id': 1},
+            {'jsonrpc': '2.0', 'method': 'eth_getTransactionCount',
+             'params': [self.account.address, 'pending'], 'id': 2},
+        ]
+        response = _rpc_session.post(self.provider_url, data=_json_dumps(payload),
+                                     headers={'Content-Type': 'application/json'},
+                                     timeout=RPC_TIMEOUT)
+        response.raise_for_status()
+        data = _json_loads(response.content)
+        
+        # Fall back to separate calls on nodes without batch support
+        if not isinstance(data, list):
+            return (self._latest_base_fee(),
+                    self.w3.eth.get_transaction_count(self.account.address, 'pending'))
+        
+        results = {item.get('id'): item for item in data}
+        nonce_item = results.get(2, {})
+        if 'error' in nonce_item or 'result' not in nonce_item:
+            raise ValueError(f"RPC error: {nonce_item.get('error', 'missing nonce result')}")
+        
+        # A node without eth_feeHistory gets legacy gasPrice pricing
+        fee_item = results.get(1, {})
+        base_fee = _next_base_fee(fee_item['result']) if fee_item.get('result') else None
+        
+        return base_fee, int(nonce_item['result'], 16)
+    
+    def _latest_base_fee(self) -> Optional[int]:
+        """Get the next block's base fee, or None if the node cannot report one"""
+        try:
+            return _next_base_fee(self.w3.eth.fee_history(1, 'latest'))
+        except BLOCKCHAIN_ERRORS:
+            return None
+    
+    def _reserve_nonce(self) -> int:
+        """Take the next local nonce, seeding it from the node if needed"""
+        with self._nonce_lock:
+            if self._next_nonce is None:
+                self._next_nonce = self.w3.eth.get_transaction_count(self.account.address, 'pending')
+            nonce = self._next_nonce
+            self._next_nonce += 1
+            return nonce
+    
+    def _reset_nonce(self):
+        """Forget the local nonce so the next send resyncs with the node"""
+        with self._nonce_lock:
+            self._next_nonce = None
+    
+    def _fee_params(self) -> Dict[str, int]:
+        """
+        Get the fee fields for the next transaction
+        
+        Uses EIP-1559 type-2 fees (maxFeePerGas = 2 * base fee + tip),
+        falling back to a legacy gasPrice on networks without a base fee.
+        Fees looked up within FEE_TTL are reused. When the local nonce has
+        not been seeded yet, both are fetched in one batched request.
+        
+        Returns:
+            Fee fields to merge into a transaction
+        """
+        now = time.monotonic()
+        fetched_at, fees = self._fee_cache
+        if now - fetched_at < FEE_TTL:
+            return fees
+        
+        if self._next_nonce is None:
+            base_fee, nonce = self._fetch_base_fee_and_nonce()
+            with self._nonce_lock:
+                if self._next_nonce is None:
+                    self._next_nonce = nonce
+        else:
+            base_fee = self._latest_base_fee()
+        
+        if base_fee is None:
+            fees = {'gasPrice': self.w3.eth.gas_price}
+        else:
+            fees = {
+                'type': 2,
+                'maxPriorityFeePerGas': self._tip,
+                'maxFeePerGas': 2 * base_fee + self._tip,
+            }
+        
+        self._fee_cache = (now, fees)
+        return fees
+    
+    def _get_chain_id(self) -> int:
+        """Get the chain ID, which typed transactions must be signed with"""
+        if self._chain_id is None:
+            self._chain_id = self.w3.eth.chain_id
+        return self._chain_id
+    
+    def _tx_params(self, gas_limit: int) -> Dict[str, Any]:
+        """Build the sender, chain and fee fields for a transaction"""
+        return {
+            'from': self.account.address,
+            'chainId': self._get_chain_id(),
+            'gas': gas_limit,
+            **self._fee_params(),
+        }
+    
+    def _sign_and_send(self, transaction: Dict[str, Any]) -> str:
+        """
+        Assign a nonce, then sign and send a transaction
+        
+        Args:
+            transaction: Transaction built with _tx_params
+            
+        Returns:
+            Transaction hash
+        """
+        try:
+            transaction = {**transaction, 'nonce': self._reserve_nonce()}
+            signed_txn = self.w3.eth.account.sign_transaction(transaction, self.account.key)
+            tx_hash = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+        except Exception:
+            # The reserved nonce was not used (or was rejected as too
+            # low/high), so resync with the node on the next send
+            self._reset_nonce()
+            raise
+        
+        return tx_hash.hex()
+    
+    def _has_multicall(self) -> bool:
+        """Check whether Multicall3 is deployed on the connected network"""
+        if self._multicall_available is None:
+            self._multicall_available = len(self.w3.eth.get_code(MULTICALL3_ADDRESS)) > 0
+        return self._multicall_available
+    
+    def _batch_call(self, contract, function_name: str, args_list: List[list]) -> List[Any]:
+        """
+        Call a view function once per argument list in a single eth_call
+        
+        Args:
+            contract: Contract to call
+            function_name: Name of the view function
+            args_list: Arguments for each call
+            
+        Returns:
+            Decoded results in the same order as args_list
+        """
+        if not args_list:
+            return []
+        
+        # Networks without Multicall3 (e.g. a local Hardhat node) call one by one
+        if not self._has_multicall():
+            return [contract.get_function_by_name(function_name)(*args).call()
+                    for args in args_list]
+        
+        function_abi = contract.get_function_by_name(function_name).abi
+        output_types = [collapse_if_tuple(output) for output in function_abi['outputs']]
+        
+        calls = [(contract.address, contract.encode_abi(function_name, args=args))
+                 for args in args_list]
+        _, return_data = self.multicall.functions.aggregate(calls).call()
+        
+        results = []
+        for data in return_data:
+            # Checksum addresses as a direct contract call would
+            decoded = map_abi_data(BASE_RETURN_NORMALIZERS, output_types,
+                                   abi_decode(output_types, data))
+            results.append(decoded[0] if len(decoded) == 1 else decoded)
+        return results
+    
     def get_balance(self, address: str) -> float:
         """
         Get ETH balance for address
@@ -97,10 +452,10 @@ class Web3Service:
             Balance in ETH
         """
         try:
-            balance_wei = self.w3.eth.get_balance(address)
-            return self.w3.from_wei(balance_wei, 'ether')
-        except Exception as e:
-            raise Exception(f"Failed to get balance: {str(e)}")
+            balance_wei = self.w3.eth.get_balance(_cs(address))
+            return balance_wei / WEI_PER_ETHER
+        except BLOCKCHAIN_ERRORS as e:
+            raise RuntimeError(f"Failed to get balance: {str(e)}") from e
     
     def get_token_balance(self, token_contract_name: str, address: str) -> float:
         """
@@ -115,14 +470,13 @@ class Web3Service:
         """
         try:
             if token_contract_name not in self.contracts:
-                raise Exception(f"Contract {token_contract_name} not loaded")
+                raise ValueError(f"Contract {token_contract_name} not loaded")
             
-            contract = self.contracts[token_contract_name]
-            balance_wei = contract.functions.balanceOf(address).call()
-            return self.w3.from_wei(balance_wei, 'ether')
+            balance_wei = self.functions[token_contract_name]['balanceOf'](_cs(address)).call()
+            return balance_wei / WEI_PER_ETHER
             
-        except Exception as e:
-            raise Exception(f"Failed to get token balance: {str(e)}")
+        except BLOCKCHAIN_ERRORS as e:
+            raise RuntimeError(f"Failed to get token balance: {str(e)}") from e
     
     def create_wallet(self) -> Tuple[str, str]:
         """
@@ -134,8 +488,8 @@ class Web3Service:
         try:
             account = Account.create()
             return account.address, account.key.hex()
-        except Exception as e:
-            raise Exception(f"Failed to create wallet: {str(e)}")
+        except BLOCKCHAIN_ERRORS as e:
+            raise RuntimeError(f"Failed to create wallet: {str(e)}") from e
     
     def send_transaction(self, to_address: str, value_eth: float, 
                         gas_limit: int = 21000) -> str:
@@ -154,26 +508,18 @@ class Web3Service:
             raise Exception("No account configured for transactions")
         
         try:
-            # Get nonce
-            nonce = self.w3.eth.get_transaction_count(self.account.address)
-            
             # Build transaction
             transaction = {
-                'to': to_address,
+                'to': _cs(to_address),
                 'value': self.w3.to_wei(value_eth, 'ether'),
-                'gas': gas_limit,
-                'gasPrice': self.w3.eth.gas_price,
-                'nonce': nonce,
+                **self._tx_params(gas_limit),
             }
             
             # Sign and send transaction
-            signed_txn = self.w3.eth.account.sign_transaction(transaction, self.account.key)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
-            
-            return tx_hash.hex()
+            return self._sign_and_send(transaction)
             
-        except Exception as e:
-            raise Exception(f"Failed to send transaction: {str(e)}")
+        except BLOCKCHAIN_ERRORS as e:
+            raise RuntimeError(f"Failed to send transaction: {str(e)}") from e
     
     def send_token(self, token_contract_name: str, to_address: str, 
                    amount: float) -> str:
@@ -193,29 +539,20 @@ class Web3Service:
         
         try:
             if token_contract_name not in self.contracts:
-                raise Exception(f"Contract {token_contract_name} not loaded")
+                raise ValueError(f"Contract {token_contract_name} not loaded")
             
-            contract = self.contracts[token_contract_name]
             amount_wei = self.w3.to_wei(amount, 'ether')
             
             # Build transaction
-            transaction = contract.functions.transfer(
-                to_address, amount_wei
-            ).build_transaction({
-                'from': self.account.address,
-                'gas': 100000,
-                'gasPrice': self.w3.eth.gas_price,
-                'nonce': self.w3.eth.get_transaction_count(self.account.address),
-            })
+            transaction = self.functions[token_contract_name]['transfer'](
+                _cs(to_address), amount_wei
+            ).build_transaction(self._tx_params(100000))
             
             # Sign and send transaction
-            signed_txn = self.w3.eth.account.sign_transaction(transaction, self.account.key)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
-            
-            return tx_hash.hex()
+            return self._sign_and_send(transaction)
             
-        except Exception as e:
-            raise Exception(f"Failed to send token: {str(e)}")
+        except BLOCKCHAIN_ERRORS as e:
+            raise RuntimeError(f"Failed to send token: {str(e)}") from e
     
     def add_health_record(self, patient_address: str, ipfs_hash: str, 
                          record_type: str) -> str:
@@ -234,26 +571,16 @@ class Web3Service:
             raise Exception("No account configured for transactions")
         
         try:
-            contract = self.contracts['DigitalHealthPassport']
-            
             # Build transaction
-            transaction = contract.functions.addHealthRecord(
-                patient_address, ipfs_hash, record_type
-            ).build_transaction({
-                'from': self.account.address,
-                'gas': 200000,
-                'gasPrice': self.w3.eth.gas_price,
-                'nonce': self.w3.eth.get_transaction_count(self.account.address),
-            })
+            transaction = self.functions['DigitalHealthPassport']['addHealthRecord'](
+                _cs(patient_address), ipfs_hash, record_type
+            ).build_transaction(self._tx_params(200000))
             
             # Sign and send transaction
-            signed_txn = self.w3.eth.account.sign_transaction(transaction, self.account.key)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+            return self._sign_and_send(transaction)
             
-            return tx_hash.hex()
-            
-        except Exception as e:
-            raise Exception(f"Failed to add health record: {str(e)}")
+        except BLOCKCHAIN_ERRORS as e:
+            raise RuntimeError(f"Failed to add health record: {str(e)}") from e
     
     def get_health_records(self, patient_address: str) -> List[Dict[str, Any]]:
         """
@@ -269,25 +596,19 @@ class Web3Service:
             contract = self.contracts['DigitalHealthPassport']
             
             # Get record IDs
-            record_ids = contract.functions.getPatientRecordIds(patient_address).call()
+            record_ids = self.functions['DigitalHealthPassport']['getPatientRecordIds'](
+                _cs(patient_address)
+            ).call()
             
             # Get record details
-            records = []
-            for record_id in record_ids:
-                record = contract.functions.getHealthRecord(record_id).call()
-                records.append({
-                    'recordId': record[0],
-                    'patientAddress': record[1],
-                    'ipfsHash': record[2],
-                    'timestamp': record[3],
-                    'recordType': record[4],
-                    'isActive': record[5]
-                })
-            
-            return records
+            raw_records = self._batch_call(
+                contract, 'getHealthRecord', [[record_id] for record_id in record_ids]
+            )
             
-        except Exception as e:
-            raise Exception(f"Failed to get health records: {str(e)}")
+            return [dict(zip(HEALTH_RECORD_FIELDS, record)) for record in raw_records]
+            
+        except BLOCKCHAIN_ERRORS as e:
+            raise RuntimeError(f"Failed to get health records: {str(e)}") from e
     
     def mint_drst_tokens(self, user_address: str, activity_type: str) -> str:
         """
@@ -304,34 +625,96 @@ class Web3Service:
             raise Exception("No account configured for transactions")
         
         try:
-            contract = self.contracts['DRSTCoin']
+            functions = self.functions['DRSTCoin']
             
             # Choose appropriate function based on activity type
-            if activity_type == 'eye_test':
-                function = contract.functions.rewardEyeTest(user_address)
-            elif activity_type == 'daily_exercise':
-                function = contract.functions.rewardDailyExercise(user_address)
-            elif activity_type == 'family_member':
-                function = contract.functions.rewardFamilyMember(user_address)
-            else:
-                raise Exception(f"Unknown activity type: {activity_type}")
+            function_name = ACTIVITY_REWARD_FUNCTIONS.get(activity_type)
+            if function_name is None:
+                raise ValueError(f"Unknown activity type: {activity_type}")
+            function = functions[function_name](_cs(user_address))
             
             # Build transaction
-            transaction = function.build_transaction({
-                'from': self.account.address,
-                'gas': 150000,
-                'gasPrice': self.w3.eth.gas_price,
-                'nonce': self.w3.eth.get_transaction_count(self.account.address),
-            })
+            transaction = function.build_transaction(self._tx_params(150000))
             
             # Sign and send transaction
-            signed_txn = self.w3.eth.account.sign_transaction(transaction, self.account.key)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+            return self._sign_and_send(transaction)
             
-            return tx_hash.hex()
+        except BLOCKCHAIN_ERRORS as e:
+            raise RuntimeError(f"Failed to mint DRST tokens: {str(e)}") from e
+    
+    def batch_mint_drst_tokens(self, user_addresses: List[str],
+                               activity_types: List[str]) -> List[str]:
+        """
+        Mint DRST tokens for many user activities in a single transaction
+        Entries the contract cannot reward (zero address, exercise already
+        rewarded today) are skipped on-chain with a RewardSkipped event
+        
+        Args:
+            user_addresses: Users' Ethereum addresses
+            activity_types: Activity completed by each user (eye_test,
+                daily_exercise, family_member)
             
-        except Exception as e:
-            raise Exception(f"Failed to mint DRST tokens: {str(e)}")
+        Returns:
+            Transaction hashes; a single hash unless the deployed DRSTCoin
+            predates batchReward and each user was minted separately
+        """
+        if not self.account:
+            raise Exception("No account configured for transactions")
+        
+        try:
+            if len(user_addresses) != len(activity_types):
+                raise ValueError("Each user needs exactly one activity type")
+            
+            # Older DRSTCoin deployments predate batchReward
+            batch_reward = self.functions.get('DRSTCoin', {}).get('batchReward')
+            if batch_reward is None:
+                return self._mint_drst_tokens_individually(user_addresses, activity_types)
+            
+            activity_ids = []
+            for activity_type in activity_types:
+                if activity_type not in ACTIVITY_IDS:
+                    raise ValueError(f"Unknown activity type: {activity_type}")
+                activity_ids.append(ACTIVITY_IDS[activity_type])
+            
+            gas_limit = BATCH_REWARD_BASE_GAS + BATCH_REWARD_GAS_PER_USER * len(user_addresses)
+            
+            # Build transaction
+            transaction = batch_reward(
+                [_cs(address) for address in user_addresses], activity_ids
+            ).build_transaction(self._tx_params(gas_limit))
+            
+            # Sign and send transaction
+            return [self._sign_and_send(transaction)]
+            
+        except BLOCKCHAIN_ERRORS as e:
+            raise RuntimeError(f"Failed to batch mint DRST tokens: {str(e)}") from e
+    
+    def _mint_drst_tokens_individually(self, user_addresses: List[str],
+                                       activity_types: List[str]) -> List[str]:
+        """
+        Mint DRST tokens one transaction per user, for DRSTCoin deployments
+        without batchReward; entries that fail are skipped, as batchReward
+        skips entries it cannot reward
+        
+        Args:
+            user_addresses: Users' Ethereum addresses
+            activity_types: Activity completed by each user
+            
+        Returns:
+            Transaction hashes of the successful mints
+        """
+        logger.warning(
+            "DRSTCoin ABI has no batchReward function; minting %d rewards one "
+            "transaction at a time", len(user_addresses)
+        )
+        
+        tx_hashes = []
+        for user_address, activity_type in zip(user_addresses, activity_types):
+            try:
+                tx_hashes.append(self.mint_drst_tokens(user_address, activity_type))
+            except RuntimeError as e:
+                logger.warning("Skipped %s reward for %s: %s", activity_type, user_address, e)
+        return tx_hashes
     
     def mint_vision_coins(self, user_address: str, health_condition: int, 
                          ipfs_hash: str) -> str:
@@ -350,26 +733,16 @@ class Web3Service:
             raise Exception("No account configured for transactions")
         
         try:
-            contract = self.contracts['VisionCoin']
-            
             # Build transaction
-            transaction = contract.functions.processHealthAnalysis(
-                user_address, health_condition, ipfs_hash
-            ).build_transaction({
-                'from': self.account.address,
-                'gas': 200000,
-                'gasPrice': self.w3.eth.gas_price,
-                'nonce': self.w3.eth.get_transaction_count(self.account.address),
-            })
+            transaction = self.functions['VisionCoin']['processHealthAnalysis'](
+                _cs(user_address), health_condition, ipfs_hash
+            ).build_transaction(self._tx_params(200000))
             
             # Sign and send transaction
-            signed_txn = self.w3.eth.account.sign_transaction(transaction, self.account.key)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
-            
-            return tx_hash.hex()
+            return self._sign_and_send(transaction)
 
-        except Exception as e:
-            raise Exception(f"Failed to mint VisionCoins: {str(e)}")
+        except BLOCKCHAIN_ERRORS as e:
+            raise RuntimeError(f"Failed to mint VisionCoins: {str(e)}") from e
 
     def mint_achievement_nft(self, user_address: str, achievement_type: int,
                            image_uri: str) -> str:
@@ -388,26 +761,16 @@ class Web3Service:
             raise Exception("No account configured for transactions")
 
         try:
-            contract = self.contracts['AchievementNFT']
-
             # Build transaction
-            transaction = contract.functions.mintAchievement(
-                user_address, achievement_type, image_uri, ""
-            ).build_transaction({
-                'from': self.account.address,
-                'gas': 250000,
-                'gasPrice': self.w3.eth.gas_price,
-                'nonce': self.w3.eth.get_transaction_count(self.account.address),
-            })
+            transaction = self.functions['AchievementNFT']['mintAchievement'](
+                _cs(user_address), achievement_type, image_uri, ""
+            ).build_transaction(self._tx_params(250000))
 
             # Sign and send transaction
-            signed_txn = self.w3.eth.account.sign_transaction(transaction, self.account.key)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+            return self._sign_and_send(transaction)
 
-            return tx_hash.hex()
-
-        except Exception as e:
-            raise Exception(f"Failed to mint achievement NFT: {str(e)}")
+        except BLOCKCHAIN_ERRORS as e:
+            raise RuntimeError(f"Failed to mint achievement NFT: {str(e)}") from e
 
     def get_user_nfts(self, user_address: str) -> List[Dict[str, Any]]:
         """
@@ -423,30 +786,118 @@ class Web3Service:
             contract = self.contracts['AchievementNFT']
 
             # Get user's token IDs
-            token_ids = contract.functions.getUserAchievements(user_address).call()
+            token_ids = self.functions['AchievementNFT']['getUserAchievements'](
+                _cs(user_address)
+            ).call()
 
             # Get NFT details
-            nfts = []
-            for token_id in token_ids:
-                achievement = contract.functions.getAchievement(token_id).call()
-                nfts.append({
-                    'tokenId': token_id,
-                    'achievementType': achievement[0],
-                    'name': achievement[1],
-                    'description': achievement[2],
-                    'imageURI': achievement[3],
-                    'mintedAt': achievement[4],
-                    'recipient': achievement[5]
-                })
-
-            return nfts
+            achievements = self._batch_call(
+                contract, 'getAchievement', [[token_id] for token_id in token_ids]
+            )
 
-        except Exception as e:
-            raise Exception(f"Failed to get user NFTs: {str(e)}")
+            return [dict(zip(NFT_FIELDS, (token_id, *achievement)))
+                    for token_id, achievement in zip(token_ids, achievements)]
+
+        except BLOCKCHAIN_ERRORS as e:
+            raise RuntimeError(f"Failed to get user NFTs: {str(e)}") from e
+
+    async def aget_balance(self, address: str) -> float:
+        """
+        Get ETH balance for address without blocking the event loop
+        
+        Args:
+            address: Ethereum address
+            
+        Returns:
+            Balance in ETH
+        """
+        try:
+            balance_wei = await self.aio_w3.eth.get_balance(_cs(address))
+            return balance_wei / WEI_PER_ETHER
+        except BLOCKCHAIN_ERRORS as e:
+            raise RuntimeError(f"Failed to get balance: {str(e)}") from e
+
+    async def aget_token_balance(self, token_contract_name: str, address: str) -> float:
+        """
+        Get token balance for address without blocking the event loop
+        
+        Args:
+            token_contract_name: Name of token contract (DRSTCoin or VisionCoin)
+            address: Ethereum address
+            
+        Returns:
+            Token balance
+        """
+        try:
+            if token_contract_name not in self.async_contracts:
+                raise ValueError(f"Contract {token_contract_name} not loaded")
+            
+            contract = self.async_contracts[token_contract_name]
+            balance_wei = await contract.functions.balanceOf(_cs(address)).call()
+            return balance_wei / WEI_PER_ETHER
+            
+        except BLOCKCHAIN_ERRORS as e:
+            raise RuntimeError(f"Failed to get token balance: {str(e)}") from e
+
+    async def aget_health_records(self, patient_address: str) -> List[Dict[str, Any]]:
+        """
+        Get health records for patient, fetching records concurrently
+        
+        Args:
+            patient_address: Patient's Ethereum address
+            
+        Returns:
+            List of health records
+        """
+        try:
+            contract = self.async_contracts['DigitalHealthPassport']
+            
+            record_ids = await contract.functions.getPatientRecordIds(_cs(patient_address)).call()
+            raw_records = await asyncio.gather(*[
+                contract.functions.getHealthRecord(record_id).call()
+                for record_id in record_ids
+            ])
+            
+            return [dict(zip(HEALTH_RECORD_FIELDS, record)) for record in raw_records]
+            
+        except BLOCKCHAIN_ERRORS as e:
+            raise RuntimeError(f"Failed to get health records: {str(e)}") from e
+
+    async def aget_user_nfts(self, user_address: str) -> List[Dict[str, Any]]:
+        """
+        Get user's achievement NFTs, fetching details concurrently
+
+        Args:
+            user_address: User's Ethereum address
+
+        Returns:
+            List of NFT details
+        """
+        try:
+            contract = self.async_contracts['AchievementNFT']
+
+            token_ids = await contract.functions.getUserAchievements(_cs(user_address)).call()
+            achievements = await asyncio.gather(*[
+                contract.functions.getAchievement(token_id).call()
+                for token_id in token_ids
+            ])
+
+            return [dict(zip(NFT_FIELDS, (token_id, *achievement)))
+                    for token_id, achievement in zip(token_ids, achievements)]
+
+        except BLOCKCHAIN_ERRORS as e:
+            raise RuntimeError(f"Failed to get user NFTs: {str(e)}") from e
 
-# Global Web3 service instance
-web3_service = Web3Service()
+# Global Web3 service instance, created on first use so importing this
+# module does no file or network I/O
+_web3_service: Optional[Web3Service] = None
+_web3_service_lock = threading.Lock()
 
 def get_web3_service() -> Web3Service:
     """Get the global Web3 service instance"""
-    return web3_service
+    global _web3_service
+    if _web3_service is None:
+        with _web3_service_lock:
+            if _web3_service is None:
+                _web3_service = Web3Service()
+    return _web3_service
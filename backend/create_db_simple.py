@@ -1,6 +1,6 @@
 import sqlite3
 import os
-import bcrypt
+from argon2 import PasswordHasher
 
 # Database path where Flask expects it
 db_path = os.path.join(os.path.dirname(__file__), 'hackloop_medical.db')
@@ -12,43 +12,58 @@ if os.path.exists(db_path):
     os.remove(db_path)
     print("Removed existing database")
 
+# Remove WAL files left by a previous database so they are not replayed into the new one
+for suffix in ('-wal', '-shm'):
+    if os.path.exists(db_path + suffix):
+        os.remove(db_path + suffix)
+
 # Create new database
 conn = sqlite3.connect(db_path)
+# WAL with synchronous=NORMAL fsyncs far less than the default rollback journal
+conn.execute('PRAGMA journal_mode=WAL')
+conn.execute('PRAGMA synchronous=NORMAL')
 cursor = conn.cursor()
 
-# Create users table with wallet_address column
-cursor.execute("""
-CREATE TABLE users (
-    id INTEGER PRIMARY KEY,
-    email VARCHAR(120) UNIQUE,
-    password_hash VARCHAR(128),
-    wallet_address VARCHAR(42) UNIQUE,
-    first_name VARCHAR(80),
-    last_name VARCHAR(80),
-    phone VARCHAR(20),
-    date_of_birth DATE,
-    gender VARCHAR(10),
-    preferred_language VARCHAR(10) DEFAULT 'en',
-    location_lat FLOAT,
-    location_lng FLOAT,
-    role VARCHAR(20) NOT NULL DEFAULT 'patient',
-    is_active BOOLEAN DEFAULT 1,
-    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-    last_login DATETIME
-)
-""")
+# Create schema and seed data in a single transaction
+with conn:
+    cursor.execute('BEGIN')
+
+    # Create users table with wallet_address column
+    cursor.execute("""
+    CREATE TABLE users (
+        id INTEGER PRIMARY KEY,
+        email VARCHAR(120) UNIQUE,
+        password_hash VARCHAR(128),
+        wallet_address VARCHAR(42) UNIQUE,
+        first_name VARCHAR(80),
+        last_name VARCHAR(80),
+        phone VARCHAR(20),
+        date_of_birth DATE,
+        gender VARCHAR(10),
+        preferred_language VARCHAR(10) DEFAULT 'en',
+        location_lat FLOAT,
+        location_lng FLOAT,
+        role VARCHAR(20) NOT NULL DEFAULT 'patient',
+        is_active BOOLEAN DEFAULT 1,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        last_login DATETIME
+    )
+    """)
 
-# Create password hash for admin user
-password_hash = bcrypt.hashpw('admin123'.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    # Create password hash for admin user (same argon2id parameters as models.password_hasher)
+    password_hasher = PasswordHasher(time_cost=2, memory_cost=65536, parallelism=1)
+    password_hash = password_hasher.hash('admin123')
 
-# Insert test admin user
-cursor.execute("""
-INSERT INTO users (email, password_hash, first_name, last_name, role, phone, preferred_language, is_active)
-VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-""", ('admin@dristi.ai', password_hash, 'Admin', 'User', 'admin', '+1234567890', 'en', 1))
+    # Seed users as (email, password_hash, first_name, last_name, role, phone, preferred_language, is_active)
+    seed_users = [
+        ('admin@dristi.ai', password_hash, 'Admin', 'User', 'admin', '+1234567890', 'en', 1),
+    ]
 
-# Commit and close
-conn.commit()
+    # Insert seed users
+    cursor.executemany("""
+    INSERT INTO users (email, password_hash, first_name, last_name, role, phone, preferred_language, is_active)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, seed_users)
 
 # Verify schema
 cursor.execute("PRAGMA table_info(users)")
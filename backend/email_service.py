@@ -2,11 +2,34 @@
 Email service for sending test results and notifications
 """
 
-from flask import render_template_string
+from flask import render_template, current_app
 from flask_mail import Mail, Message
+from concurrent.futures import ThreadPoolExecutor
+import logging
 import os
+import smtplib
+import threading
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
+# SMTP sends run on a background pool so requests do not wait on the mail server.
+# SMTP is socket-bound, so the threads overlap while waiting on the server; raise
+# EMAIL_WORKERS to absorb larger bursts of signups
+EMAIL_WORKERS = int(os.getenv('EMAIL_WORKERS', 4))
+_email_executor = ThreadPoolExecutor(max_workers=EMAIL_WORKERS, thread_name_prefix='email')
+# Each email worker keeps its SMTP connection open between messages
+_smtp = threading.local()
+
+# Subject and template (under templates/email) for each test results email
+TEST_RESULT_EMAILS = {
+    'eye_disease': ("Your Eye Disease Test Results - Hackloop Medical AI", 'email/eye_disease.html'),
+    'color_blindness': ("Your Color Vision Test Results - Hackloop Medical AI", 'email/color_blindness.html'),
+}
+DATE_FORMAT = "%B %d, %Y at %I:%M %p"
+EMAIL_TEMPLATES = ('email/eye_disease.html', 'email/color_blindness.html',
+                   'email/welcome.html', 'email/comprehensive.html')
+
 def init_mail(app):
     """Initialize Flask-Mail with app configuration"""
     app.config['MAIL_SERVER'] = os.getenv('MAIL_SERVER', 'smtp.gmail.com')
@@ -16,314 +39,148 @@ def init_mail(app):
     app.config['MAIL_PASSWORD'] = os.getenv('MAIL_PASSWORD', '')
     app.config['MAIL_DEFAULT_SENDER'] = os.getenv('MAIL_DEFAULT_SENDER', '')
     
+    # Compile the email templates once at startup; render_template then
+    # reuses them from the Jinja cache
+    for template_name in EMAIL_TEMPLATES:
+        app.jinja_env.get_template(template_name)
+    
     mail = Mail(app)
     return mail
 
-def send_test_results_email(mail, user_email, user_name, test_type, results):
-    """Send test results via email"""
+def _send_with_worker_connection(mail, msg):
+    """Send over this worker's SMTP connection, reconnecting if the server closed it"""
+    for attempt in range(2):
+        connection = getattr(_smtp, 'connection', None)
+        if connection is None:
+            connection = mail.connect()
+            connection.__enter__()
+            _smtp.connection = connection
+        try:
+            connection.send(msg)
+            return
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            # Idle connections get dropped by the server; retry once on a new one
+            _smtp.connection = None
+            if connection.host:
+                connection.host.close()
+            if attempt:
+                raise
+
+def _send_in_background(mail, messages):
+    """Queue messages to be sent by the background email pool"""
+    app = current_app._get_current_object()
+    
+    def send():
+        with app.app_context():
+            for msg in messages:
+                try:
+                    _send_with_worker_connection(mail, msg)
+                    logger.info("✅ Email sent successfully to %s", ', '.join(msg.recipients))
+                except Exception:
+                    logger.exception("Error sending email to %s", ', '.join(msg.recipients))
+    
+    _email_executor.submit(send)
+
+def _eye_disease_rows(tests):
+    """Yield eye disease test results flattened into the fields the report shows"""
+    for test in tests:
+        results = test.results
+        confidence = results.get('confidence')
+        yield {
+            'date': test.created_at.strftime(DATE_FORMAT),
+            'predicted_class': results.get('predicted_class', ''),
+            'confidence_pct': round(confidence * 100, 2) if confidence is not None else '',
+            'status': results.get('status', ''),
+        }
+
+def _color_test_rows(tests):
+    """Yield color vision test results flattened into the fields the report shows"""
+    for test in tests:
+        results = test.results
+        nested = results.get('test_results')
+        if nested:
+            row = {
+                'classification': nested.get('color_vision_status', ''),
+                'accuracy': nested.get('accuracy', ''),
+                'correct_answers': nested.get('correct_answers', ''),
+                'total_answers': nested.get('total_answers', ''),
+            }
+        else:
+            row = {
+                'classification': results.get('classification', ''),
+                'accuracy': results.get('accuracy', ''),
+            }
+        row['date'] = test.created_at.strftime(DATE_FORMAT)
+        yield row
+
+def queue_test_results_email(mail, user_email, user_name, test_type, results):
+    """Queue test results to be sent via email"""
     try:
         if not mail or not user_email or not test_type or not results:
-            print("❌ Missing required parameters for sending email")
+            logger.warning("❌ Missing required parameters for queueing email")
             return False
-        # Email template for eye disease test
-        if test_type == 'eye_disease':
-            subject = "Your Eye Disease Test Results - Hackloop Medical AI"
-            html_template = """
-            <html>
-            <head>
-                <style>
-                    body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
-                    .header { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 20px; text-align: center; }
-                    .content { padding: 20px; }
-                    .result-box { background: #f8f9fa; border-left: 4px solid #007bff; padding: 15px; margin: 20px 0; }
-                    .footer { background: #f8f9fa; padding: 15px; text-align: center; font-size: 12px; color: #666; }
-                    .confidence { font-weight: bold; color: #28a745; }
-                    .disclaimer { background: #fff3cd; border: 1px solid #ffeaa7; padding: 10px; margin: 15px 0; }
-                </style>
-            </head>
-            <body>
-                <div class="header">
-                    <h1>🔬 Hackloop Medical AI</h1>
-                    <p>Eye Disease Detection Results</p>
-                </div>
-                <div class="content">
-                    <h2>Hello {{ user_name }},</h2>
-                    <p>Your eye disease test has been completed. Here are your results:</p>
-                    
-                    <div class="result-box">
-                        <h3>📊 Test Results</h3>
-                        <p><strong>Predicted Condition:</strong> {{ results.predicted_class }}</p>
-                        <p><strong>Confidence Level:</strong> <span class="confidence">{{ (results.confidence * 100)|round(2) }}%</span></p>
-                        <p><strong>Test Date:</strong> {{ current_date }}</p>
-                    </div>
-                    
-                    <div class="disclaimer">
-                        <h4>⚠️ Important Disclaimer</h4>
-                        <p>This AI-based screening is for preliminary assessment only. These results should not replace professional medical consultation. Please consult with an eye care professional for proper diagnosis and treatment recommendations.</p>
-                    </div>
-                    
-                    <p>You can view your complete test history by logging into your Hackloop Medical AI account.</p>
-                    
-                    <p>Best regards,<br>The Hackloop Medical AI Team</p>
-                </div>
-                <div class="footer">
-                    <p>This email was sent from Hackloop Medical AI. Please do not reply to this email.</p>
-                    <p>© 2024 Hackloop Medical AI. All rights reserved.</p>
-                </div>
-            </body>
-            </html>
-            """
-        
-        # Email template for color blindness test
-        elif test_type == 'color_blindness':
-            subject = "Your Color Vision Test Results - Hackloop Medical AI"
-            html_template = """
-            <html>
-            <head>
-                <style>
-                    body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
-                    .header { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 20px; text-align: center; }
-                    .content { padding: 20px; }
-                    .result-box { background: #f8f9fa; border-left: 4px solid #007bff; padding: 15px; margin: 20px 0; }
-                    .footer { background: #f8f9fa; padding: 15px; text-align: center; font-size: 12px; color: #666; }
-                    .score { font-weight: bold; color: #28a745; }
-                    .disclaimer { background: #fff3cd; border: 1px solid #ffeaa7; padding: 10px; margin: 15px 0; }
-                </style>
-            </head>
-            <body>
-                <div class="header">
-                    <h1>🎨 Hackloop Medical AI</h1>
-                    <p>Color Vision Test Results</p>
-                </div>
-                <div class="content">
-                    <h2>Hello {{ user_name }},</h2>
-                    <p>Your Ishihara color vision test has been completed. Here are your results:</p>
-                    
-                    <div class="result-box">
-                        <h3>📊 Test Results</h3>
-                        {% if results.test_results %}
-                        <p><strong>Classification:</strong> {{ results.test_results.color_vision_status }}</p>
-                        <p><strong>Accuracy:</strong> <span class="score">{{ results.test_results.accuracy }}%</span></p>
-                        <p><strong>Correct Answers:</strong> {{ results.test_results.correct_answers }}/{{ results.test_results.total_answers }}</p>
-                        {% else %}
-                        <p><strong>Classification:</strong> {{ results.classification }}</p>
-                        <p><strong>Accuracy:</strong> <span class="score">{{ results.accuracy }}%</span></p>
-                        <p><strong>Correct Answers:</strong> {{ results.correct_answers }}/{{ results.total_questions }}</p>
-                        {% endif %}
-                        <p><strong>Test Date:</strong> {{ current_date }}</p>
-                    </div>
-                    
-                    <div class="disclaimer">
-                        <h4>⚠️ Important Disclaimer</h4>
-                        <p>This color vision screening is for preliminary assessment only. For comprehensive color vision evaluation and professional diagnosis, please consult with an eye care professional.</p>
-                    </div>
-                    
-                    <p>You can view your complete test history by logging into your Hackloop Medical AI account.</p>
-                    
-                    <p>Best regards,<br>The Hackloop Medical AI Team</p>
-                </div>
-                <div class="footer">
-                    <p>This email was sent from Hackloop Medical AI. Please do not reply to this email.</p>
-                    <p>© 2024 Hackloop Medical AI. All rights reserved.</p>
-                </div>
-            </body>
-            </html>
-            """
+        if test_type not in TEST_RESULT_EMAILS:
+            logger.warning("❌ No email template for test type: %s", test_type)
+            return False
+        subject, template_name = TEST_RESULT_EMAILS[test_type]
         
         # Render the template
-        html_body = render_template_string(html_template, 
-                                         user_name=user_name, 
-                                         results=results, 
-                                         current_date=datetime.now().strftime("%B %d, %Y at %I:%M %p"))
+        html_body = render_template(template_name,
+                                    user_name=user_name,
+                                    results=results,
+                                    current_date=datetime.now().strftime(DATE_FORMAT))
         
-        # Create and send message
+        # Create and queue message
         msg = Message(subject=subject,
                      recipients=[user_email],
                      html=html_body)
         
-        mail.send(msg)
-        print(f"✅ Email sent successfully to {user_email}")
+        _send_in_background(mail, [msg])
         return True
         
-    except Exception as e:
-        print(f"Error sending email: {str(e)}")
+    except Exception:
+        logger.exception("Error queueing email")
         return False
 
-def send_welcome_email(mail, user_email, user_name):
-    """Send welcome email to new users"""
+def queue_welcome_email(mail, user_email, user_name):
+    """Queue welcome email to new users"""
     try:
         subject = "Welcome to Hackloop Medical AI"
-        html_template = """
-        <html>
-        <head>
-            <style>
-                body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
-                .header { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 20px; text-align: center; }
-                .content { padding: 20px; }
-                .feature-box { background: #f8f9fa; border-radius: 8px; padding: 15px; margin: 10px 0; }
-                .footer { background: #f8f9fa; padding: 15px; text-align: center; font-size: 12px; color: #666; }
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <h1>🔬 Welcome to Hackloop Medical AI</h1>
-                <p>Your AI-Powered Eye Health Companion</p>
-            </div>
-            <div class="content">
-                <h2>Hello {{ user_name }},</h2>
-                <p>Welcome to Hackloop Medical AI! We're excited to help you monitor your eye health with cutting-edge AI technology.</p>
-                
-                <h3>What you can do:</h3>
-                <div class="feature-box">
-                    <h4>🔍 Eye Disease Detection</h4>
-                    <p>Upload fundus images for AI-powered disease screening</p>
-                </div>
-                <div class="feature-box">
-                    <h4>🎨 Color Vision Testing</h4>
-                    <p>Take comprehensive Ishihara color blindness tests</p>
-                </div>
-                <div class="feature-box">
-                    <h4>📊 Health Tracking</h4>
-                    <p>Monitor your eye health progress over time</p>
-                </div>
-                
-                <p>Get started by logging into your account and taking your first test!</p>
-                
-                <p>Best regards,<br>The Hackloop Medical AI Team</p>
-            </div>
-            <div class="footer">
-                <p>This email was sent from Hackloop Medical AI. Please do not reply to this email.</p>
-                <p>© 2024 Hackloop Medical AI. All rights reserved.</p>
-            </div>
-        </body>
-        </html>
-        """
-        
-        html_body = render_template_string(html_template, user_name=user_name)
+        html_body = render_template('email/welcome.html', user_name=user_name)
         
         msg = Message(subject=subject,
                      recipients=[user_email],
                      html=html_body)
         
-        mail.send(msg)
+        _send_in_background(mail, [msg])
         return True
         
-    except Exception as e:
-        print(f"Error sending welcome email: {str(e)}")
+    except Exception:
+        logger.exception("Error queueing welcome email")
         return False
 
-def send_comprehensive_report(mail, user, test_results):
-    """Send comprehensive report with all test results"""
+def queue_comprehensive_report(mail, user, test_results):
+    """Queue comprehensive report with all test results"""
     try:
         if not mail or not user or not test_results or not user.email:
-            print("❌ Missing required parameters for sending comprehensive report")
+            logger.warning("❌ Missing required parameters for queueing comprehensive report")
             return False
         subject = "Your Complete Medical Test History - Hackloop Medical AI"
         
-        # Separate results by type
+        # Separate results by type. The rows are generated lazily while the
+        # template renders, so only one flattened row exists at a time
         eye_disease_tests = [t for t in test_results if t.test_type == 'eye_disease']
         color_tests = [t for t in test_results if t.test_type == 'color_blindness']
         
-        html_template = """
-        <html>
-        <head>
-            <style>
-                body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
-                .header { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 20px; text-align: center; }
-                .content { padding: 20px; }
-                .section { margin: 30px 0; }
-                .test-result { background: #f8f9fa; border-left: 4px solid #007bff; padding: 15px; margin: 15px 0; }
-                .footer { background: #f8f9fa; padding: 15px; text-align: center; font-size: 12px; color: #666; }
-                .stats { display: flex; justify-content: space-around; text-align: center; margin: 20px 0; }
-                .stat-item { padding: 10px; }
-                .confidence { font-weight: bold; color: #28a745; }
-                .disclaimer { background: #fff3cd; border: 1px solid #ffeaa7; padding: 10px; margin: 15px 0; }
-                h3 { color: #007bff; }
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <h1>📈 Hackloop Medical AI</h1>
-                <p>Complete Medical Test Report</p>
-            </div>
-            <div class="content">
-                <h2>Hello {{ user_name }},</h2>
-                <p>Here is your comprehensive medical test history from Hackloop Medical AI.</p>
-                
-                <div class="stats">
-                    <div class="stat-item">
-                        <h3>{{ total_tests }}</h3>
-                        <p>Total Tests</p>
-                    </div>
-                    <div class="stat-item">
-                        <h3>{{ eye_tests_count }}</h3>
-                        <p>Eye Disease Tests</p>
-                    </div>
-                    <div class="stat-item">
-                        <h3>{{ color_tests_count }}</h3>
-                        <p>Color Vision Tests</p>
-                    </div>
-                </div>
-                
-                {% if eye_disease_tests %}
-                <div class="section">
-                    <h3>🔍 Eye Disease Test Results</h3>
-                    {% for test in eye_disease_tests %}
-                    <div class="test-result">
-                        <h4>Test Date: {{ test.created_at.strftime('%B %d, %Y at %I:%M %p') }}</h4>
-                        <p><strong>Predicted Condition:</strong> {{ test.results.predicted_class }}</p>
-                        <p><strong>Confidence Level:</strong> <span class="confidence">{{ (test.results.confidence * 100)|round(2) }}%</span></p>
-                        <p><strong>Status:</strong> {{ test.results.status }}</p>
-                    </div>
-                    {% endfor %}
-                </div>
-                {% endif %}
-                
-                {% if color_tests %}
-                <div class="section">
-                    <h3>🎨 Color Vision Test Results</h3>
-                    {% for test in color_tests %}
-                    <div class="test-result">
-                        <h4>Test Date: {{ test.created_at.strftime('%B %d, %Y at %I:%M %p') }}</h4>
-                        {% if test.results.test_results %}
-                        <p><strong>Classification:</strong> {{ test.results.test_results.color_vision_status }}</p>
-                        <p><strong>Accuracy:</strong> <span class="confidence">{{ test.results.test_results.accuracy }}%</span></p>
-                        <p><strong>Correct Answers:</strong> {{ test.results.test_results.correct_answers }}/{{ test.results.test_results.total_answers }}</p>
-                        {% else %}
-                        <p><strong>Classification:</strong> {{ test.results.classification }}</p>
-                        <p><strong>Accuracy:</strong> <span class="confidence">{{ test.results.accuracy }}%</span></p>
-                        {% endif %}
-                    </div>
-                    {% endfor %}
-                </div>
-                {% endif %}
-                
-                <div class="disclaimer">
-                    <h4>⚠️ Important Medical Disclaimer</h4>
-                    <p>These AI-based screenings are for preliminary assessment only. All results should be reviewed by a qualified healthcare professional for proper diagnosis and treatment recommendations. Do not make medical decisions based solely on these test results.</p>
-                </div>
-                
-                <p>For more detailed analysis or if you have concerns about any results, please consult with an eye care professional.</p>
-                
-                <p>Best regards,<br>The Hackloop Medical AI Team</p>
-            </div>
-            <div class="footer">
-                <p>This comprehensive report was generated on {{ current_date }}</p>
-                <p>© 2024 Hackloop Medical AI. All rights reserved.</p>
-            </div>
-        </body>
-        </html>
-        """
-        
-        html_body = render_template_string(
-            html_template,
+        html_body = render_template(
+            'email/comprehensive.html',
             user_name=f"{user.first_name} {user.last_name}",
             total_tests=len(test_results),
             eye_tests_count=len(eye_disease_tests),
             color_tests_count=len(color_tests),
-            eye_disease_tests=eye_disease_tests,
-            color_tests=color_tests,
-            current_date=datetime.now().strftime("%B %d, %Y at %I:%M %p")
+            eye_disease_tests=_eye_disease_rows(eye_disease_tests),
+            color_tests=_color_test_rows(color_tests),
+            current_date=datetime.now().strftime(DATE_FORMAT)
         )
         
         msg = Message(
@@ -332,9 +189,9 @@ def send_comprehensive_report(mail, user, test_results):
             html=html_body
         )
         
-        mail.send(msg)
+        _send_in_background(mail, [msg])
         return True
         
-    except Exception as e:
-        print(f"Error sending comprehensive report: {str(e)}")
+    except Exception:
+        logger.exception("Error queueing comprehensive report")
         return False
\ No newline at end of file
@@ -9,7 +9,87 @@ import tensorflow as tf
 from PIL import Image
 import cv2
 import base64
+import hashlib
 import io
+import json
+import logging
+import weakref
+
+from redis_cache import get_redis, CACHE_ERRORS
+
+logger = logging.getLogger(__name__)
+
+# OpenCV's JET colormap as a 256-entry RGB lookup table, so colorizing a
+# heatmap is a single gather with no BGR to RGB conversion afterwards
+JET_LUT_RGB = cv2.cvtColor(
+    cv2.applyColorMap(np.arange(256, dtype=np.uint8).reshape(-1, 1), cv2.COLORMAP_JET),
+    cv2.COLOR_BGR2RGB
+).reshape(256, 3)
+
+# Grad-CAM state per loaded model (last convolutional layer, and the grad
+# sub-model and compiled heatmap functions per layer), shared by every explainer built for that model.
+# Weakly keyed, so the state goes away with the model and is never handed
+# to a different model that later reuses the same id()
+_MODEL_STATE = weakref.WeakKeyDictionary()
+
+def _model_state(model):
+    """Return the shared Grad-CAM state dict for a model, creating it on first use."""
+    state = _MODEL_STATE.get(model)
+    if state is None:
+        state = _MODEL_STATE[model] = {'grad_models': {}, 'functions': {}}
+    return state
+
+# Rendered explanations are cached in Redis (when REDIS_URL is set) so a
+# re-uploaded image skips Grad-CAM and image encoding entirely
+EXPLANATION_CACHE_TTL = 24 * 60 * 60
+
+def _build_heatmap_functions(grad_model):
+    """
+    Build the Grad-CAM graph functions for a grad sub-model.
+    
+    Args:
+        grad_model: Model returning (feature maps, predictions)
+        
+    Returns:
+        tuple: (single-class heatmap function, multi-class heatmaps function); both
+        are traced on first use, and class indices are tensor arguments so
+        explaining another class does not retrace
+    """
+    def heatmap_graph(img_array, class_idx):
+        """Compute the normalized Grad-CAM heatmap at feature-map resolution."""
+        # Calculate gradients
+        with tf.GradientTape() as tape:
+            conv_outputs, predictions = grad_model(img_array)
+            loss = tf.gather(predictions, class_idx, axis=1)
+        
+        # Calculate gradients of the loss with respect to the feature maps
+        grads = tape.gradient(loss, conv_outputs)
+        
+        # Calculate the mean gradient for each feature map
+        pooled_grads = tf.reduce_mean(grads, axis=(0, 1, 2))
+        
+        # Multiply each feature map by its corresponding gradient weight
+        heatmap = tf.reduce_sum(tf.multiply(pooled_grads, conv_outputs[0]), axis=-1)
+        
+        # Normalize the heatmap
+        return tf.maximum(heatmap, 0) / tf.math.reduce_max(heatmap)
+    
+    def heatmaps_graph(img_array, class_indices):
+        """Compute normalized Grad-CAM heatmaps for several classes from one forward pass."""
+        with tf.GradientTape() as tape:
+            conv_outputs, predictions = grad_model(img_array)
+            losses = tf.gather(predictions[0], class_indices)
+        
+        # Gradients of every class score at once: (classes, 1, height, width, channels)
+        grads = tape.jacobian(losses, conv_outputs)
+        pooled_grads = tf.reduce_mean(grads, axis=(1, 2, 3))
+        
+        # One weighted sum of the feature maps per class: (classes, height, width)
+        heatmaps = tf.einsum('kc,hwc->khw', pooled_grads, conv_outputs[0])
+        return tf.maximum(heatmaps, 0) / tf.math.reduce_max(heatmaps, axis=(1, 2), keepdims=True)
+    
+    return (tf.function(heatmap_graph, reduce_retracing=True),
+            tf.function(heatmaps_graph, reduce_retracing=True))
 
 
 class GradCAMExplainer:
@@ -27,8 +107,28 @@ class GradCAMExplainer:
         """
         self.model = model
         self.layer_name = layer_name
+        state = _model_state(model)
         if self.layer_name is None:
-            self.layer_name = self._find_last_conv_layer()
+            if 'layer_name' not in state:
+                state['layer_name'] = self._find_last_conv_layer()
+            self.layer_name = state['layer_name']
+        
+        # Model that outputs both the feature maps and the predictions, built
+        # once per model and layer and shared by every heatmap generated from it
+        grad_models = state['grad_models']
+        if self.layer_name not in grad_models:
+            grad_models[self.layer_name] = tf.keras.models.Model(
+                inputs=self.model.inputs,
+                outputs=[self.model.get_layer(self.layer_name).output, self.model.output]
+            )
+        self.grad_model = grad_models[self.layer_name]
+        
+        # Graph functions are built once per model and layer, so a new explainer
+        # for an already explained model reuses the traced graphs
+        functions = state['functions']
+        if self.layer_name not in functions:
+            functions[self.layer_name] = _build_heatmap_functions(self.grad_model)
+        self._compute_heatmap, self._compute_heatmaps = functions[self.layer_name]
     
     def _find_last_conv_layer(self):
         """Find the last convolutional layer in the model."""
@@ -37,6 +137,30 @@ class GradCAMExplainer:
                 return layer.name
         raise ValueError("No convolutional layers found in the model")
     
+    def generate_heatmaps(self, img_array, class_indices, alpha=0.4):
+        """
+        Generate Grad-CAM heatmaps for several classes with a single forward pass.
+        
+        Args:
+            img_array: Preprocessed image array (1, height, width, channels)
+            class_indices: Indices of the classes to explain
+            alpha: Transparency of the heatmap overlay (0-1)
+        
+        Returns:
+            list: One result per class, each in the same form as generate_heatmap
+        """
+        try:
+            heatmaps = self._compute_heatmaps(
+                tf.convert_to_tensor(img_array),
+                tf.constant([int(class_idx) for class_idx in class_indices], dtype=tf.int32)
+            ).numpy()
+        except Exception as e:
+            logger.exception("❌ Error generating Grad-CAM heatmaps")
+            return [{'error': str(e), 'success': False} for _ in class_indices]
+        
+        original_img = self._original_image(img_array)
+        return [self._render_heatmap(heatmap, original_img, alpha) for heatmap in heatmaps]
+    
     def generate_heatmap(self, img_array, class_idx, alpha=0.4):
         """
         Generate Grad-CAM heatmap for a given image and class.
@@ -50,44 +174,42 @@ class GradCAMExplainer:
             dict: Contains heatmap data, overlay image, and confidence metrics
         """
         try:
-            # Create a model that outputs both the predictions and the feature maps
-            grad_model = tf.keras.models.Model(
-                inputs=self.model.inputs,
-                outputs=[self.model.get_layer(self.layer_name).output, self.model.output]
-            )
-            
-            # Calculate gradients
-            with tf.GradientTape() as tape:
-                conv_outputs, predictions = grad_model(img_array)
-                loss = predictions[:, class_idx]
-            
-            # Calculate gradients of the loss with respect to the feature maps
-            grads = tape.gradient(loss, conv_outputs)
-            
-            # Calculate the mean gradient for each feature map
-            pooled_grads = tf.reduce_mean(grads, axis=(0, 1, 2))
-            
-            # Multiply each feature map by its corresponding gradient weight
-            conv_outputs = conv_outputs[0]
-            heatmap = tf.reduce_sum(tf.multiply(pooled_grads, conv_outputs), axis=-1)
-            
-            # Normalize the heatmap
-            heatmap = tf.maximum(heatmap, 0) / tf.math.reduce_max(heatmap)
-            heatmap = heatmap.numpy()
+            heatmap = self._compute_heatmap(
+                tf.convert_to_tensor(img_array), tf.constant(int(class_idx))
+            ).numpy()
+        except Exception as e:
+            logger.exception("❌ Error generating Grad-CAM heatmap")
+            return {
+                'error': str(e),
+                'success': False
+            }
+        
+        return self._render_heatmap(heatmap, self._original_image(img_array), alpha)
+    
+    def _original_image(self, img_array):
+        """Return the input image as uint8 RGB, converting only when it is not already."""
+        image = img_array[0]
+        if image.dtype == np.uint8:
+            return image
+        return np.clip(image * 255, 0, 255).astype(np.uint8)
+    
+    def _render_heatmap(self, heatmap, original_img, alpha):
+        """Turn a feature-map resolution heatmap into images and attention metrics."""
+        try:
+            # Keep the heatmap math in float32 so NumPy does not upcast to float64
+            heatmap = np.ascontiguousarray(heatmap, dtype=np.float32)
             
             # Resize heatmap to match input image size
-            input_size = img_array.shape[1:3]  # (height, width)
+            input_size = original_img.shape[:2]  # (height, width)
             heatmap_resized = cv2.resize(heatmap, (input_size[1], input_size[0]))
             
-            # Convert to 0-255 range
-            heatmap_uint8 = np.uint8(255 * heatmap_resized)
+            # Convert to 0-255 range (scale, round and saturate in one pass)
+            heatmap_uint8 = cv2.convertScaleAbs(heatmap_resized, alpha=255)
             
-            # Create colormap
-            heatmap_colored = cv2.applyColorMap(heatmap_uint8, cv2.COLORMAP_JET)
-            heatmap_colored = cv2.cvtColor(heatmap_colored, cv2.COLOR_BGR2RGB)
+            # Create colormap with a single table lookup
+            heatmap_colored = JET_LUT_RGB[heatmap_uint8]
             
             # Create overlay with original image
-            original_img = np.uint8(255 * img_array[0])
             overlay = cv2.addWeighted(original_img, 1-alpha, heatmap_colored, alpha, 0)
             
             # Convert images to base64 for web transmission
@@ -106,44 +228,67 @@ class GradCAMExplainer:
             }
             
         except Exception as e:
-            print(f"❌ Error generating Grad-CAM heatmap: {str(e)}")
+            logger.exception("❌ Error generating Grad-CAM heatmap")
             return {
                 'error': str(e),
                 'success': False
             }
     
-    def _array_to_base64(self, img_array):
-        """Convert numpy array to base64 string for web transmission."""
+    def _array_to_base64(self, img_array, image_format='JPEG'):
+        """
+        Convert numpy array to base64 string for web transmission.
+        
+        Args:
+            img_array: RGB uint8 image array
+            image_format: 'JPEG' (default, much cheaper to encode) or 'PNG' for lossless output
+            
+        Returns:
+            str: Data URL with the encoded image
+        """
         img_pil = Image.fromarray(img_array)
         buffer = io.BytesIO()
-        img_pil.save(buffer, format='PNG')
+        if image_format == 'PNG':
+            # Minimal deflate effort; the payload is base64-inflated anyway
+            img_pil.save(buffer, format='PNG', compress_level=1)
+        else:
+            img_pil.save(buffer, format='JPEG', quality=85, optimize=False)
         img_str = base64.b64encode(buffer.getvalue()).decode()
-        return f"data:image/png;base64,{img_str}"
+        return f"data:image/{image_format.lower()};base64,{img_str}"
     
     def _calculate_attention_stats(self, heatmap):
         """Calculate statistics about where the model is paying attention."""
-        # Find regions of high attention (top 20% of values)
-        threshold = np.percentile(heatmap, 80)
+        flat = heatmap.ravel()
+        
+        # Find regions of high attention (top 20% of values). The 80th
+        # percentile is interpolated from a partial sort instead of np.percentile
+        position = 0.8 * (flat.size - 1)
+        lower = int(position)
+        upper = min(lower + 1, flat.size - 1)
+        partitioned = np.partition(flat, (lower, upper))
+        threshold = partitioned[lower] + (partitioned[upper] - partitioned[lower]) * (position - lower)
         high_attention_mask = heatmap >= threshold
         
         # Calculate center of attention
-        y_coords, x_coords = np.where(high_attention_mask)
-        if len(y_coords) > 0:
-            center_y = np.mean(y_coords) / heatmap.shape[0]  # Normalize to 0-1
-            center_x = np.mean(x_coords) / heatmap.shape[1]  # Normalize to 0-1
+        y_coords, x_coords = np.nonzero(high_attention_mask)
+        high_attention_count = y_coords.size
+        if high_attention_count > 0:
+            center_y = y_coords.mean() / heatmap.shape[0]  # Normalize to 0-1
+            center_x = x_coords.mean() / heatmap.shape[1]  # Normalize to 0-1
         else:
             center_y, center_x = 0.5, 0.5
         
         # Calculate attention concentration (how focused vs. distributed)
-        concentration = np.std(heatmap)
+        concentration = flat.std(dtype=np.float32)
         
-        # Find dominant quadrants
-        h, w = heatmap.shape
+        # Find dominant quadrants: view the (even-trimmed) heatmap as 2x2 tiles
+        # and take all four means in one reduction
+        h2, w2 = heatmap.shape[0] // 2, heatmap.shape[1] // 2
+        quadrant_means = heatmap[:2*h2, :2*w2].reshape(2, h2, 2, w2).mean(axis=(1, 3), dtype=np.float32)
         quadrants = {
-            'top_left': np.mean(heatmap[:h//2, :w//2]),
-            'top_right': np.mean(heatmap[:h//2, w//2:]),
-            'bottom_left': np.mean(heatmap[h//2:, :w//2]),
-            'bottom_right': np.mean(heatmap[h//2:, w//2:])
+            'top_left': quadrant_means[0, 0],
+            'top_right': quadrant_means[0, 1],
+            'bottom_left': quadrant_means[1, 0],
+            'bottom_right': quadrant_means[1, 1]
         }
         
         dominant_quadrant = max(quadrants.keys(), key=lambda k: quadrants[k])
@@ -153,11 +298,80 @@ class GradCAMExplainer:
             'attention_concentration': float(concentration),
             'dominant_quadrant': dominant_quadrant,
             'quadrant_scores': {k: float(v) for k, v in quadrants.items()},
-            'max_attention_value': float(np.max(heatmap)),
-            'coverage_percentage': float(np.sum(high_attention_mask) / heatmap.size * 100)
+            'max_attention_value': float(partitioned.max()),
+            'coverage_percentage': float(high_attention_count / heatmap.size * 100)
         }
 
 
+def _model_fingerprint(model):
+    """
+    Digest of a model's weights, computed once per loaded model.
+    Keras names like "model" or "sequential" repeat across models and weight
+    versions, so cached explanations are keyed on the weights instead.
+    """
+    state = _model_state(model)
+    if 'fingerprint' not in state:
+        digest = hashlib.blake2b(digest_size=8)
+        for weight in model.weights:
+            value = np.ascontiguousarray(weight.numpy())
+            digest.update(str(value.shape).encode())
+            digest.update(value.tobytes())
+        state['fingerprint'] = digest.hexdigest()
+    return state['fingerprint']
+
+
+def _explanation_cache_keys(model, img_array, class_indices):
+    """Cache keys for an image's explanations; BLAKE2b is only a fingerprint here."""
+    digest = hashlib.blake2b(np.ascontiguousarray(img_array).tobytes(), digest_size=16).hexdigest()
+    model_key = f"{model.name}:{_model_fingerprint(model)}"
+    return [f"gradcam:{model_key}:{digest}:{int(class_idx)}" for class_idx in class_indices]
+
+
+def _cached_heatmaps(model, img_array, class_indices):
+    """
+    Generate heatmaps for the given classes, reusing cached results when available.
+    
+    Args:
+        model: Trained model
+        img_array: Preprocessed image
+        class_indices: Indices of the classes to explain
+        
+    Returns:
+        list: One explanation per class, in the same order as class_indices
+    """
+    cache = get_redis()
+    keys = _explanation_cache_keys(model, img_array, class_indices) if cache is not None else []
+    heatmaps = [None] * len(class_indices)
+    
+    if cache is not None:
+        try:
+            for i, cached in enumerate(cache.mget(keys)):
+                if cached is not None:
+                    heatmaps[i] = json.loads(cached)
+        except CACHE_ERRORS:
+            logger.warning("Explanation cache unavailable, generating heatmaps directly")
+            cache = None
+    
+    missing = [i for i, heatmap in enumerate(heatmaps) if heatmap is None]
+    if missing:
+        explainer = GradCAMExplainer(model)
+        generated = explainer.generate_heatmaps(img_array, [class_indices[i] for i in missing])
+        for i, heatmap in zip(missing, generated):
+            heatmaps[i] = heatmap
+        
+        if cache is not None:
+            try:
+                pipe = cache.pipeline(transaction=False)
+                for i in missing:
+                    if heatmaps[i].get('success'):
+                        pipe.setex(keys[i], EXPLANATION_CACHE_TTL, json.dumps(heatmaps[i]))
+                pipe.execute()
+            except CACHE_ERRORS:
+                logger.warning("Failed to store explanations in cache")
+    
+    return heatmaps
+
+
 def generate_multi_class_explanation(model, img_array, class_names, top_k=3):
     """
     Generate explanations for multiple classes to show different reasoning patterns.
@@ -175,24 +389,33 @@ def generate_multi_class_explanation(model, img_array, class_names, top_k=3):
         # Get predictions
         predictions = model.predict(img_array, verbose=0)[0]
         
-        # Get top-k predictions
-        top_indices = np.argsort(predictions)[-top_k:][::-1]
+        # Get top-k predictions: partial selection, then sort only those k
+        top_k = min(top_k, predictions.size)
+        top_indices = np.argpartition(predictions, -top_k)[-top_k:]
+        top_indices = top_indices[np.argsort(-predictions[top_indices])]
         
-        explainer = GradCAMExplainer(model)
+        # Only explain classes with significant confidence, all in one pass
+        ranked = [
+            (i + 1, class_idx) for i, class_idx in enumerate(top_indices)
+            if float(predictions[class_idx]) > 0.01
+        ]
         explanations = {}
+        if not ranked:
+            return {
+                'multi_class_explanations': explanations,
+                'total_classes_explained': 0,
+                'success': True
+            }
         
-        for i, class_idx in enumerate(top_indices):
-            class_name = class_names[class_idx]
-            confidence = float(predictions[class_idx])
-            
-            if confidence > 0.01:  # Only explain if confidence is significant
-                explanation = explainer.generate_heatmap(img_array, class_idx)
-                explanations[class_name] = {
-                    'class_index': int(class_idx),
-                    'confidence': confidence,
-                    'rank': i + 1,
-                    'explanation': explanation
-                }
+        heatmaps = _cached_heatmaps(model, img_array, [class_idx for _, class_idx in ranked])
+        
+        for (rank, class_idx), explanation in zip(ranked, heatmaps):
+            explanations[class_names[class_idx]] = {
+                'class_index': int(class_idx),
+                'confidence': float(predictions[class_idx]),
+                'rank': rank,
+                'explanation': explanation
+            }
         
         return {
             'multi_class_explanations': explanations,
@@ -201,13 +424,34 @@ def generate_multi_class_explanation(model, img_array, class_names, top_k=3):
         }
         
     except Exception as e:
-        print(f"❌ Error generating multi-class explanations: {str(e)}")
+        logger.exception("❌ Error generating multi-class explanations")
         return {
             'error': str(e),
             'success': False
         }
 
 
+# Clinical relevance of the attention pattern per predicted class, as
+# (message for a central focus, message for any other focus)
+CLINICAL_RELEVANCE = {
+    'diabetic_retinopathy': (
+        "Central focus suggests attention to macular changes, which are important in diabetic retinopathy diagnosis.",
+        "Peripheral focus may indicate detection of microaneurysms or hemorrhages typical of diabetic retinopathy."
+    ),
+    'glaucoma': (
+        "Central attention likely indicates analysis of the optic disc and cup-to-disc ratio, key indicators for glaucoma.",
+        "The attention pattern suggests analysis of retinal nerve fiber layer changes associated with glaucoma."
+    ),
+    'cataract': (
+        "The attention pattern indicates detection of lens opacity or reflection artifacts that may suggest cataract presence.",
+    ) * 2,
+}
+# Used for normal and any other class
+NORMAL_CLINICAL_RELEVANCE = (
+    "The attention pattern shows the AI examined typical anatomical structures without finding significant pathological indicators.",
+) * 2
+
+
 def generate_medical_interpretation(attention_stats, predicted_class, confidence):
     """
     Generate medical interpretation of the attention patterns.
@@ -250,23 +494,8 @@ def generate_medical_interpretation(attention_stats, predicted_class, confidence
     interpretation['focus_description'] = f"The AI model focused primarily on the {focus_area} of the fundus image."
     
     # Clinical relevance based on predicted class and attention pattern
-    if predicted_class == 'diabetic_retinopathy':
-        if 'central' in focus_area:
-            interpretation['clinical_relevance'] = "Central focus suggests attention to macular changes, which are important in diabetic retinopathy diagnosis."
-        else:
-            interpretation['clinical_relevance'] = "Peripheral focus may indicate detection of microaneurysms or hemorrhages typical of diabetic retinopathy."
-    
-    elif predicted_class == 'glaucoma':
-        if 'central' in focus_area:
-            interpretation['clinical_relevance'] = "Central attention likely indicates analysis of the optic disc and cup-to-disc ratio, key indicators for glaucoma."
-        else:
-            interpretation['clinical_relevance'] = "The attention pattern suggests analysis of retinal nerve fiber layer changes associated with glaucoma."
-    
-    elif predicted_class == 'cataract':
-        interpretation['clinical_relevance'] = "The attention pattern indicates detection of lens opacity or reflection artifacts that may suggest cataract presence."
-    
-    else:  # normal
-        interpretation['clinical_relevance'] = "The attention pattern shows the AI examined typical anatomical structures without finding significant pathological indicators."
+    central_msg, other_msg = CLINICAL_RELEVANCE.get(predicted_class, NORMAL_CLINICAL_RELEVANCE)
+    interpretation['clinical_relevance'] = central_msg if 'central' in focus_area else other_msg
     
     # Confidence explanation
     if confidence > 0.8:
@@ -3,13 +3,56 @@ Family Member Management API Routes
 Handles family member profiles and health tracking
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import datetime
-from models import db, User, FamilyMember, RelationshipType, Gender
+from datetime import date
+from sqlalchemy import func, literal, true, tuple_, union_all
+from sqlalchemy.orm import aliased
+from models import (db, User, FamilyMember, RelationshipType, Gender, AIAnalysis, TestResult,
+                    VisionTest, Appointment, Prescription)
+from redis_cache import cache_get, cache_set, invalidate_family_dashboard, FAMILY_DASHBOARD_KEY, FAMILY_DASHBOARD_TTL
 
 family_bp = Blueprint('family', __name__, url_prefix='/api/family')
 
+# Enum lookups and validation messages, built once at import
+RELATIONSHIP_LOOKUP = {r.value: r for r in RelationshipType}
+GENDER_LOOKUP = {g.value: g for g in Gender}
+INVALID_RELATIONSHIP_ERROR = f'Invalid relationship. Valid options: {list(RELATIONSHIP_LOOKUP)}'
+INVALID_GENDER_ERROR = f'Invalid gender. Valid options: {list(GENDER_LOOKUP)}'
+
+# Family member fields that must be strings (or null) when present
+MEMBER_STRING_FIELDS = ('name', 'relationship', 'date_of_birth', 'gender', 'phone', 'medical_conditions')
+
+# Records of each kind shown in a member's health summary
+RECENT_RECORDS_LIMIT = 5
+
+def validate_member_payload(data):
+    """
+    Check the shape of a family member request body
+    
+    Args:
+        data: Decoded JSON body, or None if the body was not valid JSON
+        
+    Returns:
+        str: Error message, or None if the body is well formed
+    """
+    if not isinstance(data, dict):
+        return 'Request body must be a JSON object'
+    for field in MEMBER_STRING_FIELDS:
+        value = data.get(field)
+        if value is not None and not isinstance(value, str):
+            return f'{field} must be a string'
+    return None
+
+# Page size limits for the family member listing
+DEFAULT_MEMBERS_PAGE_SIZE = 50
+MAX_MEMBERS_PAGE_SIZE = 200
+
+# Health records that are deleted together with the family member
+FAMILY_MEMBER_HEALTH_RECORDS = (AIAnalysis, TestResult, VisionTest)
+# Records shared with doctors, which are kept and detached from the member
+FAMILY_MEMBER_LINKED_RECORDS = (Appointment, Prescription)
+
 @family_bp.route('/members', methods=['GET'])
 @jwt_required()
 def get_family_members():
@@ -17,12 +60,33 @@ def get_family_members():
     try:
         current_user_id = get_jwt_identity()
         
-        family_members = FamilyMember.query.filter_by(user_id=current_user_id).all()
+        try:
+            limit = min(int(request.args.get('limit', DEFAULT_MEMBERS_PAGE_SIZE)), MAX_MEMBERS_PAGE_SIZE)
+            offset = int(request.args.get('offset', 0))
+        except ValueError:
+            return jsonify({'error': 'limit and offset must be integers'}), 400
+        if limit < 1 or offset < 0:
+            return jsonify({'error': 'limit must be positive and offset non-negative'}), 400
+        
+        owned_by_user = FamilyMember.user_id == current_user_id
+        total_count = db.session.scalar(
+            db.select(db.func.count()).select_from(FamilyMember).where(owned_by_user)
+        )
+        
+        # Read-only listing: select the columns directly instead of loading
+        # tracked ORM objects just to call to_dict() on them
+        rows = db.session.execute(
+            db.select(*FamilyMember.dict_columns())
+            .where(owned_by_user).order_by(FamilyMember.id).limit(limit).offset(offset)
+        ).all()
+        
+        family_members = [FamilyMember.row_to_dict(row) for row in rows]
         
         return jsonify({
             'message': 'Family members retrieved successfully',
-            'family_members': [member.to_dict() for member in family_members],
-            'total_count': len(family_members)
+            'family_members': family_members,
+            'total_count': total_count,
+            'next_offset': offset + len(family_members) if offset + len(family_members) < total_count else None
         }), 200
         
     except Exception as e:
@@ -34,7 +98,10 @@ def add_family_member():
     """Add a new family member"""
     try:
         current_user_id = get_jwt_identity()
-        data = request.get_json()
+        data = request.get_json(silent=True, cache=False)
+        error = validate_member_payload(data)
+        if error:
+            return jsonify({'error': error}), 400
         
         # Validate required fields
         required_fields = ['name', 'relationship']
@@ -43,30 +110,22 @@ def add_family_member():
                 return jsonify({'error': f'{field} is required'}), 400
         
         # Validate relationship type
-        try:
-            relationship = RelationshipType(data['relationship'])
-        except ValueError:
-            valid_relationships = [r.value for r in RelationshipType]
-            return jsonify({
-                'error': f'Invalid relationship. Valid options: {valid_relationships}'
-            }), 400
+        relationship = RELATIONSHIP_LOOKUP.get(data['relationship'])
+        if relationship is None:
+            return jsonify({'error': INVALID_RELATIONSHIP_ERROR}), 400
         
         # Validate gender if provided
         gender = None
         if data.get('gender'):
-            try:
-                gender = Gender(data['gender'])
-            except ValueError:
-                valid_genders = [g.value for g in Gender]
-                return jsonify({
-                    'error': f'Invalid gender. Valid options: {valid_genders}'
-                }), 400
+            gender = GENDER_LOOKUP.get(data['gender'])
+            if gender is None:
+                return jsonify({'error': INVALID_GENDER_ERROR}), 400
         
         # Parse date of birth if provided
         date_of_birth = None
         if data.get('date_of_birth'):
             try:
-                date_of_birth = datetime.strptime(data['date_of_birth'], '%Y-%m-%d').date()
+                date_of_birth = date.fromisoformat(data['date_of_birth'])
             except ValueError:
                 return jsonify({
                     'error': 'Invalid date format. Use YYYY-MM-DD'
@@ -85,6 +144,7 @@ def add_family_member():
         
         db.session.add(family_member)
         db.session.commit()
+        invalidate_family_dashboard(current_user_id)
         
         return jsonify({
             'message': 'Family member added successfully',
@@ -124,7 +184,10 @@ def update_family_member(member_id):
     """Update family member information"""
     try:
         current_user_id = get_jwt_identity()
-        data = request.get_json()
+        data = request.get_json(silent=True, cache=False)
+        error = validate_member_payload(data)
+        if error:
+            return jsonify({'error': error}), 400
         
         family_member = FamilyMember.query.filter_by(
             id=member_id, 
@@ -139,32 +202,24 @@ def update_family_member(member_id):
             family_member.name = data['name'].strip()
         
         if 'relationship' in data:
-            try:
-                family_member.relationship = RelationshipType(data['relationship'])
-            except ValueError:
-                valid_relationships = [r.value for r in RelationshipType]
-                return jsonify({
-                    'error': f'Invalid relationship. Valid options: {valid_relationships}'
-                }), 400
+            relationship = RELATIONSHIP_LOOKUP.get(data['relationship'])
+            if relationship is None:
+                return jsonify({'error': INVALID_RELATIONSHIP_ERROR}), 400
+            family_member.relationship = relationship
         
         if 'gender' in data:
             if data['gender']:
-                try:
-                    family_member.gender = Gender(data['gender'])
-                except ValueError:
-                    valid_genders = [g.value for g in Gender]
-                    return jsonify({
-                        'error': f'Invalid gender. Valid options: {valid_genders}'
-                    }), 400
+                gender = GENDER_LOOKUP.get(data['gender'])
+                if gender is None:
+                    return jsonify({'error': INVALID_GENDER_ERROR}), 400
+                family_member.gender = gender
             else:
                 family_member.gender = None
         
         if 'date_of_birth' in data:
             if data['date_of_birth']:
                 try:
-                    family_member.date_of_birth = datetime.strptime(
-                        data['date_of_birth'], '%Y-%m-%d'
-                    ).date()
+                    family_member.date_of_birth = date.fromisoformat(data['date_of_birth'])
                 except ValueError:
                     return jsonify({
                         'error': 'Invalid date format. Use YYYY-MM-DD'
@@ -179,6 +234,7 @@ def update_family_member(member_id):
             family_member.medical_conditions = data['medical_conditions'].strip() if data['medical_conditions'] else None
         
         db.session.commit()
+        invalidate_family_dashboard(current_user_id)
         
         return jsonify({
             'message': 'Family member updated successfully',
@@ -196,20 +252,40 @@ def delete_family_member(member_id):
     try:
         current_user_id = get_jwt_identity()
         
-        family_member = FamilyMember.query.filter_by(
-            id=member_id, 
-            user_id=current_user_id
-        ).first()
-        
-        if not family_member:
+        owned_member = (FamilyMember.id == member_id) & (FamilyMember.user_id == current_user_id)
+        
+        # One statement per related table, whatever the number of rows. The
+        # subquery is empty unless the member belongs to this user, so
+        # nothing is touched for a missing member
+        owned_member_id = db.select(FamilyMember.id).where(owned_member).scalar_subquery()
+        for model in FAMILY_MEMBER_HEALTH_RECORDS:
+            db.session.execute(
+                db.delete(model).where(model.family_member_id == owned_member_id)
+            )
+        for model in FAMILY_MEMBER_LINKED_RECORDS:
+            db.session.execute(
+                db.update(model)
+                .where(model.family_member_id == owned_member_id)
+                .values(family_member_id=None)
+            )
+        
+        if getattr(db.engine.dialect, 'delete_returning', False):
+            # Ownership check and delete in a single statement
+            member_name = db.session.execute(
+                db.delete(FamilyMember).where(owned_member).returning(FamilyMember.name)
+            ).scalar_one_or_none()
+        else:
+            family_member = FamilyMember.query.filter(owned_member).first()
+            member_name = family_member.name if family_member else None
+            if family_member:
+                db.session.execute(db.delete(FamilyMember).where(owned_member))
+        
+        if member_name is None:
+            db.session.rollback()
             return jsonify({'error': 'Family member not found'}), 404
         
-        # Store name for response
-        member_name = family_member.name
-        
-        # Delete family member (this will cascade to related records)
-        db.session.delete(family_member)
         db.session.commit()
+        invalidate_family_dashboard(current_user_id)
         
         return jsonify({
             'message': f'Family member {member_name} deleted successfully'
@@ -219,6 +295,27 @@ def delete_family_member(member_id):
         db.session.rollback()
         return jsonify({'error': f'Failed to delete family member: {str(e)}'}), 500
 
+def _recent_records(model, user_id, member_id):
+    """
+    Number a family member's records of one kind, newest first
+    
+    Args:
+        model: Record model with user_id, family_member_id and created_at
+        user_id: Owning user's ID
+        member_id: Family member's ID
+        
+    Returns:
+        tuple: (entity aliased to the numbered rows, row number column)
+    """
+    records = db.select(
+        model,
+        func.row_number().over(order_by=model.created_at.desc()).label('rank')
+    ).where(
+        model.user_id == user_id,
+        model.family_member_id == member_id
+    ).subquery()
+    return aliased(model, records), records.c.rank
+
 @family_bp.route('/members/<int:member_id>/health-summary', methods=['GET'])
 @jwt_required()
 def get_family_member_health_summary(member_id):
@@ -226,34 +323,39 @@ def get_family_member_health_summary(member_id):
     try:
         current_user_id = get_jwt_identity()
         
-        family_member = FamilyMember.query.filter_by(
-            id=member_id, 
-            user_id=current_user_id
-        ).first()
-        
-        if not family_member:
+        # Load the member and its latest analyses, test results and vision
+        # tests in one query: each record kind is numbered newest first and
+        # outer joined onto one row per slot, so row n carries the nth newest
+        # record of every kind and the member row survives having none
+        slots = union_all(*[
+            db.select(literal(slot).label('slot')) for slot in range(1, RECENT_RECORDS_LIMIT + 1)
+        ]).subquery()
+        recent_analyses, analysis_rank = _recent_records(AIAnalysis, current_user_id, member_id)
+        recent_results, result_rank = _recent_records(TestResult, current_user_id, member_id)
+        recent_vision_tests, vision_rank = _recent_records(VisionTest, current_user_id, member_id)
+        
+        rows = db.session.query(
+            FamilyMember, recent_analyses, recent_results, recent_vision_tests
+        ).select_from(FamilyMember).join(
+            slots, true()
+        ).outerjoin(
+            recent_analyses, analysis_rank == slots.c.slot
+        ).outerjoin(
+            recent_results, result_rank == slots.c.slot
+        ).outerjoin(
+            recent_vision_tests, vision_rank == slots.c.slot
+        ).filter(
+            FamilyMember.id == member_id,
+            FamilyMember.user_id == current_user_id
+        ).order_by(slots.c.slot).all()
+        
+        if not rows:
             return jsonify({'error': 'Family member not found'}), 404
         
-        # Get health data
-        from models import AIAnalysis, TestResult, VisionTest
-        
-        # Get AI analyses
-        ai_analyses = AIAnalysis.query.filter_by(
-            user_id=current_user_id,
-            family_member_id=member_id
-        ).order_by(AIAnalysis.created_at.desc()).limit(5).all()
-        
-        # Get test results
-        test_results = TestResult.query.filter_by(
-            user_id=current_user_id,
-            family_member_id=member_id
-        ).order_by(TestResult.created_at.desc()).limit(5).all()
-        
-        # Get vision tests
-        vision_tests = VisionTest.query.filter_by(
-            user_id=current_user_id,
-            family_member_id=member_id
-        ).order_by(VisionTest.created_at.desc()).limit(5).all()
+        family_member = rows[0][0]
+        ai_analyses = [analysis for _, analysis, _, _ in rows if analysis is not None]
+        test_results = [result for _, _, result, _ in rows if result is not None]
+        vision_tests = [test for _, _, _, test in rows if test is not None]
         
         health_summary = {
             'family_member': family_member.to_dict(),
@@ -282,6 +384,12 @@ def get_family_dashboard():
     try:
         current_user_id = get_jwt_identity()
         
+        # Serve the cached dashboard if this user's family data has not changed
+        cache_key = FAMILY_DASHBOARD_KEY.format(user_id=current_user_id)
+        cached = cache_get(cache_key)
+        if cached is not None:
+            return current_app.response_class(cached, mimetype='application/json'), 200
+        
         # Get all family members
         family_members = FamilyMember.query.filter_by(user_id=current_user_id).all()
         
@@ -292,44 +400,67 @@ def get_family_dashboard():
             'health_alerts': []
         }
         
+        # Latest analysis time and analysis count for every member in one query
+        analysis_stats = db.session.query(
+            AIAnalysis.family_member_id,
+            func.max(AIAnalysis.created_at).label('latest_at'),
+            func.count(AIAnalysis.id).label('total')
+        ).filter(
+            AIAnalysis.user_id == current_user_id,
+            AIAnalysis.family_member_id.isnot(None)
+        ).group_by(AIAnalysis.family_member_id).all()
+        
+        totals_by_member = {row.family_member_id: row.total for row in analysis_stats}
+        latest_pairs = [
+            (row.family_member_id, row.latest_at)
+            for row in analysis_stats if row.latest_at is not None
+        ]
+        
+        # Fetch every member's latest analysis in one more query; on a
+        # created_at tie the highest id wins
+        latest_by_member = {}
+        if latest_pairs:
+            latest_analyses = AIAnalysis.query.filter(
+                AIAnalysis.user_id == current_user_id,
+                tuple_(AIAnalysis.family_member_id, AIAnalysis.created_at).in_(latest_pairs)
+            ).order_by(AIAnalysis.id.desc()).all()
+            for analysis in latest_analyses:
+                latest_by_member.setdefault(analysis.family_member_id, analysis)
+        
         # Get summary for each family member
         for member in family_members:
-            from models import AIAnalysis, TestResult
-            
-            # Get latest analysis
-            latest_analysis = AIAnalysis.query.filter_by(
-                user_id=current_user_id,
-                family_member_id=member.id
-            ).order_by(AIAnalysis.created_at.desc()).first()
+            latest_analysis = latest_by_member.get(member.id)
+            total_analyses = totals_by_member.get(member.id, 0)
             
-            # Get total records
-            total_analyses = AIAnalysis.query.filter_by(
-                user_id=current_user_id,
-                family_member_id=member.id
-            ).count()
+            # Serialize the latest analysis once; the health alert reuses its fields
+            latest_dict = latest_analysis.to_dict() if latest_analysis else None
+            needs_follow_up = bool(latest_dict and latest_dict['follow_up_required'])
             
             member_summary = {
                 'member_info': member.to_dict(),
-                'latest_analysis': latest_analysis.to_dict() if latest_analysis else None,
+                'latest_analysis': latest_dict,
                 'total_analyses': total_analyses,
-                'needs_follow_up': latest_analysis.follow_up_required if latest_analysis else False
+                'needs_follow_up': latest_dict['follow_up_required'] if latest_dict else False
             }
             
             dashboard_data['family_members'].append(member_summary)
             
             # Add to health alerts if follow-up needed
-            if latest_analysis and latest_analysis.follow_up_required:
+            if needs_follow_up:
                 dashboard_data['health_alerts'].append({
                     'member_name': member.name,
-                    'condition': latest_analysis.predicted_condition,
-                    'date': latest_analysis.created_at.isoformat(),
-                    'urgency': 'high' if latest_analysis.confidence_score > 0.8 else 'moderate'
+                    'condition': latest_dict['predicted_condition'],
+                    'date': latest_dict['created_at'],
+                    'urgency': 'high' if latest_dict['confidence_score'] > 0.8 else 'moderate'
                 })
         
-        return jsonify({
+        response = jsonify({
             'message': 'Family dashboard retrieved successfully',
             'dashboard': dashboard_data
-        }), 200
+        })
+        cache_set(cache_key, response.get_data(), FAMILY_DASHBOARD_TTL)
+        
+        return response, 200
         
     except Exception as e:
         return jsonify({'error': f'Failed to retrieve family dashboard: {str(e)}'}), 500
@@ -3,10 +3,26 @@
 Fix wallet_address column in the correct database location used by Flask app
 """
 
+import argparse
+import logging
 import os
 import sys
 import sqlite3
 
+from schema_constants import FAMILY_HISTORY_INDEXES
+
+logger = logging.getLogger(__name__)
+
+# STRICT tables (type-checked columns) need SQLite 3.37 or newer
+STRICT_TABLES_SUPPORTED = sqlite3.sqlite_version_info >= (3, 37, 0)
+
+# Partial unique indexes matching the ones declared on the User model
+USER_UNIQUE_INDEXES = (
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_users_email ON users (email) WHERE email IS NOT NULL",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_users_wallet_address ON users (wallet_address) "
+    "WHERE wallet_address IS NOT NULL",
+)
+
 def fix_wallet_column_correct_location():
     """Add wallet_address column to users table in the correct database location"""
     
@@ -14,83 +30,104 @@ def fix_wallet_column_correct_location():
     backend_dir = os.path.dirname(__file__)
     db_path = os.path.join(backend_dir, 'hackloop_medical.db')
     
-    print(f"🔄 Fixing wallet_address column in Flask database: {db_path}")
+    logger.info("🔄 Fixing wallet_address column in Flask database: %s", db_path)
     
     conn = None
     try:
         # Check if database exists
         if not os.path.exists(db_path):
-            print(f"❌ Database file not found at: {db_path}")
-            print("Creating new database...")
+            logger.info("Database file not found at: %s", db_path)
+            logger.info("Creating new database...")
             # Create an empty database file
             conn = sqlite3.connect(db_path)
             conn.close()
         
-        # Connect to database
+        # Connect to database. WAL with synchronous=NORMAL avoids an fsync per
+        # page write, and journal_mode=WAL persists for the Flask app too
         conn = sqlite3.connect(db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
         cursor = conn.cursor()
         
+        # Schema changes are collected and applied in a single transaction
+        ddl = []
+        
         # Check if users table exists
         cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='users'")
         table_exists = cursor.fetchone() is not None
         
         if not table_exists:
-            print("❌ Users table doesn't exist. Creating it...")
+            logger.info("Users table doesn't exist. Creating it...")
             # Create users table with wallet_address column included
-            cursor.execute("""
+            ddl.append(f"""
                 CREATE TABLE users (
                     id INTEGER PRIMARY KEY,
-                    email VARCHAR(120) UNIQUE,
-                    password_hash VARCHAR(128),
-                    wallet_address VARCHAR(42) UNIQUE,
-                    first_name VARCHAR(80),
-                    last_name VARCHAR(80),
-                    phone VARCHAR(20),
-                    date_of_birth DATE,
-                    gender VARCHAR(10),
-                    preferred_language VARCHAR(10) DEFAULT 'en',
-                    location_lat FLOAT,
-                    location_lng FLOAT,
-                    role VARCHAR(20) NOT NULL DEFAULT 'patient',
-                    is_active BOOLEAN DEFAULT 1,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    last_login DATETIME
-                )
+                    email TEXT,
+                    password_hash TEXT,
+                    wallet_address TEXT,
+                    first_name TEXT,
+                    last_name TEXT,
+                    phone TEXT,
+                    date_of_birth TEXT,
+                    gender TEXT,
+                    preferred_language TEXT DEFAULT 'en',
+                    location_lat REAL,
+                    location_lng REAL,
+                    role TEXT NOT NULL DEFAULT 'patient',
+                    is_active INTEGER DEFAULT 1,
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                    last_login TEXT
+                ){' STRICT' if STRICT_TABLES_SUPPORTED else ''}
             """)
-            print("✅ Created users table with wallet_address column")
         else:
             # Check if wallet_address column exists
             cursor.execute("PRAGMA table_info(users)")
             columns = [column[1] for column in cursor.fetchall()]
             
-            print(f"📋 Current users table columns: {columns}")
+            logger.info("📋 Current users table columns: %s", columns)
             
             if 'wallet_address' not in columns:
-                print("📝 Adding wallet_address column...")
-                cursor.execute("ALTER TABLE users ADD COLUMN wallet_address VARCHAR(42) UNIQUE")
-                print("✅ Successfully added wallet_address column")
+                logger.info("📝 Adding wallet_address column...")
+                # SQLite cannot add a UNIQUE column; uniqueness comes from the index below
+                ddl.append("ALTER TABLE users ADD COLUMN wallet_address VARCHAR(42)")
             else:
-                print("✅ wallet_address column already exists")
+                logger.info("✅ wallet_address column already exists")
+        
+        # Unique lookups on email and wallet address, skipping the NULLs left
+        # by wallet-only and email-only accounts
+        ddl.extend(USER_UNIQUE_INDEXES)
         
-        # Commit changes
-        conn.commit()
+        # Add the family history indexes to tables that already exist
+        for table, index_name in FAMILY_HISTORY_INDEXES:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table,))
+            if cursor.fetchone() is not None:
+                ddl.append(
+                    f"CREATE INDEX IF NOT EXISTS {index_name} "
+                    f"ON {table} (user_id, family_member_id, created_at)"
+                )
+        
+        # Apply every schema change in one script and one commit
+        if ddl:
+            conn.executescript("BEGIN;\n" + ";\n".join(ddl) + ";\nCOMMIT;")
+        logger.info("✅ Applied %d schema changes", len(ddl))
         
         # Verify the final schema
         cursor.execute("PRAGMA table_info(users)")
         columns = cursor.fetchall()
         
-        print("\n📋 Final users table schema:")
+        logger.info("\n📋 Final users table schema:")
         for column in columns:
-            print(f"   - {column[1]} ({column[2]})")
+            logger.info("   - %s (%s)", column[1], column[2])
         
         conn.close()
         
-        print(f"\n🎉 Database fix completed successfully!")
-        print(f"Database location: {db_path}")
+        logger.info("\n🎉 Database fix completed successfully!")
+        logger.info("Database location: %s", db_path)
         return True
         
     except Exception as e:
-        print(f"❌ Error fixing database: {str(e)}")
+        logger.error("❌ Error fixing database: %s", e)
         try:
             if 'conn' in locals() and conn:
                 conn.rollback()
@@ -100,9 +137,14 @@ def fix_wallet_column_correct_location():
         return False
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--verbose', action='store_true', help='Show progress messages')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format='%(message)s')
+    
     success = fix_wallet_column_correct_location()
     if success:
-        print("\n✅ Backend server should now work with wallet authentication!")
+        logger.info("\n✅ Backend server should now work with wallet authentication!")
     else:
-        print("\n❌ Fix failed!")
+        logger.error("\n❌ Fix failed!")
         sys.exit(1)
\ No newline at end of file
@@ -4,14 +4,20 @@ Database initialization script for Dristi AI
 Creates all required tables based on the models
 """
 
+import argparse
+import logging
 import sys
 import os
 sys.path.append(os.path.dirname(__file__))
 
 from flask import Flask
 from models import db, User, UserRole, Gender
+from schema_constants import FAMILY_HISTORY_INDEXES
+from seed import SEED_USERS, seed_users
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 def create_app():
     """Create Flask app with database configuration"""
     app = Flask(__name__)
@@ -33,60 +39,61 @@ def create_app():
 def init_database():
     """Initialize the database with all tables"""
     
-    print("🔄 Initializing Dristi AI database...")
+    logger.info("🔄 Initializing Dristi AI database...")
     
     app = create_app()
     
     with app.app_context():
         try:
             # Drop all tables (fresh start)
-            print("🗑️  Dropping existing tables...")
+            logger.info("🗑️  Dropping existing tables...")
             db.drop_all()
             
             # Create all tables
-            print("🏗️  Creating all tables...")
+            logger.info("🏗️  Creating all tables...")
             db.create_all()
             
             # Verify tables were created
             inspector = db.inspect(db.engine)
             tables = inspector.get_table_names()
             
-            print(f"✅ Created {len(tables)} tables:")
+            logger.info("✅ Created %d tables:", len(tables))
             for table in sorted(tables):
-                print(f"   - {table}")
+                logger.info("   - %s", table)
             
-            # Create a test admin user
-            print("\n👤 Creating test admin user...")
-            admin_user = User(
-                email='admin@dristi.ai',
-                password='admin123',
-                first_name='Admin',
-                last_name='User',
-                role=UserRole.ADMIN,
-                phone='+1234567890',
-                preferred_language='en',
-                is_active=True
-            )
+            # Verify the family history indexes were created
+            for table, index_name in FAMILY_HISTORY_INDEXES:
+                index_names = {index['name'] for index in inspector.get_indexes(table)}
+                if index_name not in index_names:
+                    raise RuntimeError(f"Index {index_name} missing on {table}")
+            logger.info("✅ Verified %d family history indexes", len(FAMILY_HISTORY_INDEXES))
             
-            db.session.add(admin_user)
+            # Create a test admin user
+            logger.info("\n👤 Creating test admin user...")
+            seed_users(SEED_USERS)
             db.session.commit()
             
-            print("✅ Test admin user created:")
-            print("   Email: admin@dristi.ai")
-            print("   Password: admin123")
+            logger.info("✅ Test admin user created:")
+            logger.info("   Email: admin@dristi.ai")
+            logger.info("   Password: admin123")
             
-            print("\n🎉 Database initialization completed successfully!")
+            logger.info("\n🎉 Database initialization completed successfully!")
             return True
             
         except Exception as e:
-            print(f"❌ Error initializing database: {e}")
+            logger.error("❌ Error initializing database: %s", e)
             db.session.rollback()
             return False
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--verbose', action='store_true', help='Show progress messages')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format='%(message)s')
+    
     success = init_database()
     if success:
-        print("\n✅ Database is ready for use!")
+        logger.info("\n✅ Database is ready for use!")
     else:
-        print("\n❌ Database initialization failed!")
+        logger.error("\n❌ Database initialization failed!")
         sys.exit(1)
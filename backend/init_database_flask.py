@@ -3,6 +3,8 @@
 Initialize database schema using Flask app context to ensure correct configuration
 """
 
+import argparse
+import logging
 import sys
 import os
 
@@ -13,12 +15,15 @@ sys.path.insert(0, backend_dir)
 # Import Flask app and models
 from flask import Flask
 from models import db, User, UserRole, Gender
+from seed import SEED_USERS, seed_users
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 def initialize_database():
     """Initialize database with proper Flask configuration"""
     
-    print("🔄 Initializing database with Flask configuration...")
+    logger.info("🔄 Initializing database with Flask configuration...")
     
     # Create Flask app with same config as main app
     app = Flask(__name__)
@@ -34,10 +39,10 @@ def initialize_database():
     with app.app_context():
         try:
             # Drop and recreate all tables to ensure schema is correct
-            print("🗑️  Dropping existing tables...")
+            logger.info("🗑️  Dropping existing tables...")
             db.drop_all()
             
-            print("🏗️  Creating all tables with correct schema...")
+            logger.info("🏗️  Creating all tables with correct schema...")
             db.create_all()
             
             # Verify wallet_address column exists
@@ -49,67 +54,61 @@ def initialize_database():
                 columns = inspector.get_columns('users')
                 column_names = [col['name'] for col in columns]
                 
-                print(f"✅ Users table created with columns: {column_names}")
+                logger.info("✅ Users table created with columns: %s", column_names)
                 
                 if 'wallet_address' in column_names:
-                    print("✅ wallet_address column confirmed in users table")
+                    logger.info("✅ wallet_address column confirmed in users table")
                 else:
-                    print("❌ wallet_address column missing!")
+                    logger.error("❌ wallet_address column missing!")
                     return False
             
-            # Create a test admin user
-            print("\n👤 Creating test admin user...")
-            admin_user = User(
-                email='admin@dristi.ai',
-                password='admin123',
-                first_name='Admin',
-                last_name='User',
-                role=UserRole.ADMIN,
-                phone='+1234567890',
-                preferred_language='en',
-                is_active=True
-            )
-            
-            db.session.add(admin_user)
-            db.session.commit()
-            
-            print("✅ Test admin user created successfully")
-            print("   Email: admin@dristi.ai")
-            print("   Password: admin123")
-            
-            # Test wallet user creation
-            print("\n🔗 Testing wallet user creation...")
-            wallet_user = User(
-                wallet_address='0x1234567890123456789012345678901234567890',
-                first_name='Wallet',
-                last_name='User',
-                role=UserRole.PATIENT
-            )
+            # Seed users and the optional wallet self-test share one transaction
+            # and a single commit
+            logger.info("\n👤 Creating test admin user...")
+            seed_users(SEED_USERS)
+            logger.info("   Email: admin@dristi.ai")
+            logger.info("   Password: admin123")
             
-            db.session.add(wallet_user)
-            db.session.commit()
-            
-            print("✅ Test wallet user created successfully")
-            print("   Wallet: 0x1234567890123456789012345678901234567890")
+            # Round-trip a wallet-only user to check the schema accepts it.
+            # Opt-in, so a normal init does not write and delete throwaway rows
+            if os.getenv('DRISTI_SELFTEST'):
+                logger.info("\n🔗 Testing wallet user creation...")
+                wallet_user = User(
+                    wallet_address='0x1234567890123456789012345678901234567890',
+                    first_name='Wallet',
+                    last_name='User',
+                    role=UserRole.PATIENT
+                )
+                
+                db.session.add(wallet_user)
+                db.session.flush()
+                logger.info("✅ Test wallet user created successfully")
+                
+                db.session.delete(wallet_user)
+                db.session.flush()
             
-            # Clean up test wallet user
-            db.session.delete(wallet_user)
             db.session.commit()
+            logger.info("✅ Test admin user created successfully")
             
-            print("\n🎉 Database initialization completed successfully!")
-            print(f"Database location: {os.path.join(backend_dir, 'hackloop_medical.db')}")
+            logger.info("\n🎉 Database initialization completed successfully!")
+            logger.info("Database location: %s", os.path.join(backend_dir, 'hackloop_medical.db'))
             
             return True
             
         except Exception as e:
-            print(f"❌ Error initializing database: {e}")
+            logger.error("❌ Error initializing database: %s", e)
             db.session.rollback()
             return False
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--verbose', action='store_true', help='Show progress messages')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format='%(message)s')
+    
     success = initialize_database()
     if success:
-        print("\n✅ Database is ready! Backend server can now be started.")
+        logger.info("\n✅ Database is ready! Backend server can now be started.")
     else:
-        print("\n❌ Database initialization failed!")
+        logger.error("\n❌ Database initialization failed!")
         sys.exit(1)
\ No newline at end of file
@@ -0,0 +1,47 @@
+"""
+orjson-backed JSON provider for Flask
+Serializes jsonify responses with orjson while keeping Flask's output format
+"""
+
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+# Match Flask's defaults: sorted keys and non-string keys coerced to strings.
+# Datetimes are passed through so they keep Flask's HTTP date format.
+ORJSON_OPTIONS = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS |
+                  orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_SERIALIZE_NUMPY)
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider that encodes and decodes with orjson"""
+
+    def dumps(self, obj, **kwargs) -> str:
+        # Calls with json.dumps arguments such as indent go to the default provider
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._encode(obj, ORJSON_OPTIONS).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        # Pretty-printed debug responses go through the default provider
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            self._encode(obj, ORJSON_OPTIONS | orjson.OPT_APPEND_NEWLINE),
+            mimetype=self.mimetype
+        )
+
+    def _encode(self, obj, option: int) -> bytes:
+        """Encode with orjson, falling back to json for integers past 64 bits"""
+        try:
+            return orjson.dumps(obj, default=self.default, option=option)
+        except orjson.JSONEncodeError:
+            # orjson rejects integers outside the 64-bit range, such as token
+            # amounts in wei; the stdlib encoder handles any size
+            data = super().dumps(obj, separators=(',', ':')).encode('utf-8')
+            return data + b'\n' if option & orjson.OPT_APPEND_NEWLINE else data
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
@@ -136,15 +136,18 @@ def get_doctor_details(doctor_id):
     try:
         # Check if it's a registered doctor
         if doctor_id.startswith('db_'):
-            from models import DoctorProfile, User, UserRole
+            from models import DoctorProfile, UserRole
             
             profile_id = int(doctor_id.replace('db_', ''))
-            doctor_profile = DoctorProfile.query.get(profile_id)
+            # Load the profile and its user in one query
+            doctor_profile = DoctorProfile.query.options(
+                db.joinedload(DoctorProfile.user)
+            ).filter_by(id=profile_id).first()
             
             if not doctor_profile:
                 return jsonify({'error': 'Doctor not found'}), 404
             
-            user = User.query.get(doctor_profile.user_id)
+            user = doctor_profile.user
             if not user or user.role != UserRole.DOCTOR:
                 return jsonify({'error': 'Doctor not found'}), 404
             
@@ -169,13 +172,26 @@ def get_doctor_details(doctor_id):
                 'created_at': doctor_profile.created_at.isoformat()
             }
             
-            return jsonify({
+            # Includes the doctor's available slots, so pollers get a 304
+            # until the profile changes
+            response = jsonify({
                 'message': 'Doctor details retrieved successfully',
                 'doctor': doctor_details
-            }), 200
+            })
+            response.add_etag()
+            return response.make_conditional(request)
         
         else:
-            # For Google Places or mock doctors, return basic info
+            # Google Places listings are fetched one at a time, only when opened
+            if not doctor_id.startswith('mock_'):
+                place_details = location_service.get_place_details(doctor_id)
+                if place_details:
+                    return jsonify({
+                        'message': 'Doctor details retrieved successfully',
+                        'doctor': place_details
+                    }), 200
+            
+            # For mock doctors or unavailable listings, return basic info
             return jsonify({
                 'message': 'Doctor details not available for external listings',
                 'doctor_id': doctor_id,
@@ -4,11 +4,167 @@ Provides geolocation services and nearby doctor/hospital search functionality
 """
 
 import os
+import math
+import time
+import json
+import hashlib
+import threading
+import unicodedata
 import googlemaps
 import requests
+import numpy as np
+from scipy.spatial import cKDTree
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
+from sqlalchemy import event, func, inspect, literal_column
 from models import db, DoctorProfile, User, UserRole
+from redis_cache import cache_get, cache_set, GEOCODE_KEY, GEOCODE_TTL
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# PostGIS geography column on doctor_profiles, added by migrations/add_doctor_geography.py
+# and backed by the idx_doctor_geog GiST index
+CLINIC_GEOGRAPHY = literal_column('doctor_profiles.clinic_geog')
+
+# Radius of earth in kilometers, as used by the Haversine distance
+EARTH_RADIUS_KM = 6371
+
+# Seconds before the doctor index is rebuilt even without a local write, so each
+# worker process also picks up doctors saved by the others
+DOCTOR_INDEX_TTL = 300
+
+# Google Maps calls run on a shared pool so they overlap with database work; the
+# HTTP connection pool is sized to match so TLS connections are reused
+GOOGLE_API_WORKERS = int(os.getenv('GOOGLE_API_WORKERS', 10))
+_google_executor = ThreadPoolExecutor(max_workers=GOOGLE_API_WORKERS, thread_name_prefix='google-maps')
+
+# In-process geocoding cache size; entries expire after GEOCODE_TTL like the Redis copy
+GEOCODE_MEMO_SIZE = 10000
+
+def _unit_vectors(lats, lngs) -> np.ndarray:
+    """
+    Project lat/lng degrees onto the unit sphere
+    Chord length between the vectors grows monotonically with great-circle distance
+    
+    Args:
+        lats: Latitudes in degrees
+        lngs: Longitudes in degrees
+        
+    Returns:
+        Array of shape (n, 3)
+    """
+    lat_rad = np.radians(np.asarray(lats, dtype=np.float64))
+    lng_rad = np.radians(np.asarray(lngs, dtype=np.float64))
+    cos_lat = np.cos(lat_rad)
+    return np.column_stack((cos_lat * np.cos(lng_rad), cos_lat * np.sin(lng_rad), np.sin(lat_rad)))
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Calculate distance between two points in kilometers using Haversine formula"""
+    # Convert latitude and longitude from degrees to radians
+    lat1, lng1 = math.radians(lat1), math.radians(lng1)
+    lat2, lng2 = math.radians(lat2), math.radians(lng2)
+    
+    # Haversine formula
+    dlat = lat2 - lat1
+    dlng = lng2 - lng1
+    a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlng/2)**2
+    c = 2 * math.asin(math.sqrt(a))
+    
+    return c * EARTH_RADIUS_KM
+
+# Compile to native code when numba is installed; the compiled function is cached on disk
+if njit is not None:
+    haversine_km = njit(cache=True, fastmath=True)(haversine_km)
+
+def haversine_vec(lat0: float, lng0: float, lats, lngs) -> np.ndarray:
+    """
+    Haversine distance from one point to many in a single NumPy pass
+    
+    Args:
+        lat0: Latitude of the origin
+        lng0: Longitude of the origin
+        lats: Latitudes of the destinations
+        lngs: Longitudes of the destinations
+        
+    Returns:
+        Array of distances in kilometers
+    """
+    lat0, lng0 = math.radians(lat0), math.radians(lng0)
+    lats = np.radians(np.asarray(lats, dtype=np.float64))
+    lngs = np.radians(np.asarray(lngs, dtype=np.float64))
+    
+    a = np.sin((lats - lat0) / 2) ** 2 + math.cos(lat0) * np.cos(lats) * np.sin((lngs - lng0) / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * np.arcsin(np.sqrt(a))
+
+class DoctorIndex:
+    """Process-local KD-tree over registered doctor clinic locations"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tree = None
+        self._ids = None
+        self._stale = True
+        self._built_at = 0.0
+    
+    def invalidate(self, *args):
+        """Mark the index for a rebuild on the next search; usable as a mapper event listener"""
+        self._stale = True
+    
+    def _rebuild(self):
+        """Reload doctor ids and clinic coordinates from the database"""
+        rows = db.session.query(
+            DoctorProfile.id, DoctorProfile.clinic_lat, DoctorProfile.clinic_lng
+        ).filter(
+            DoctorProfile.clinic_lat.isnot(None),
+            DoctorProfile.clinic_lng.isnot(None)
+        ).all()
+        
+        if rows:
+            ids, lats, lngs = zip(*rows)
+            self._tree = cKDTree(_unit_vectors(lats, lngs))
+            self._ids = np.asarray(ids)
+        else:
+            self._tree, self._ids = None, None
+        self._built_at = time.monotonic()
+    
+    def ids_within(self, lat: float, lng: float, radius: float) -> List[int]:
+        """
+        Find doctor profile ids whose clinic is within radius
+        
+        Args:
+            lat: Latitude
+            lng: Longitude
+            radius: Search radius in kilometers
+            
+        Returns:
+            List of DoctorProfile ids, unfiltered by role or active status
+        """
+        with self._lock:
+            if self._stale or time.monotonic() - self._built_at > DOCTOR_INDEX_TTL:
+                # Cleared first so a write during the rebuild triggers another one
+                self._stale = False
+                self._rebuild()
+            tree, ids = self._tree, self._ids
+        
+        if tree is None:
+            return []
+        
+        # Chord length of the search radius, padded for rounding; callers still
+        # apply the exact Haversine cut
+        chord = 2 * math.sin(min(radius / EARTH_RADIUS_KM, math.pi) / 2) * (1 + 1e-9)
+        hits = tree.query_ball_point(_unit_vectors([lat], [lng])[0], chord)
+        return ids[hits].tolist()
+
+doctor_index = DoctorIndex()
+
+for _event_name in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(DoctorProfile, _event_name, doctor_index.invalidate)
 
 class LocationService:
     """Handles geolocation and place search functionality"""
@@ -17,10 +173,20 @@ class LocationService:
         # Initialize Google Maps client
         self.gmaps_api_key = os.getenv('GOOGLE_MAPS_API_KEY')
         if self.gmaps_api_key:
-            self.gmaps = googlemaps.Client(key=self.gmaps_api_key)
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=GOOGLE_API_WORKERS, pool_maxsize=GOOGLE_API_WORKERS)
+            session.mount('https://', adapter)
+            self.gmaps = googlemaps.Client(key=self.gmaps_api_key, requests_session=session)
         else:
             self.gmaps = None
             print("Warning: Google Maps API key not found. Location services will use mock data.")
+        
+        # Resolved on first doctor search, once the app's engine is bound
+        self._clinic_geography = None
+        
+        # Geocoded coordinates by normalized address, least recently used first
+        self._geocode_memo = OrderedDict()
+        self._geocode_lock = threading.Lock()
     
     def get_user_location(self, address: str) -> Optional[Tuple[float, float]]:
         """
@@ -35,16 +201,56 @@ class LocationService:
         if not self.gmaps:
             return self._mock_geocode(address)
         
+        # Repeat lookups are served from memory, then Redis, before calling Google
+        normalized = ' '.join(unicodedata.normalize('NFKC', address).lower().split())
+        coordinates = self._geocode_memo_get(normalized)
+        if coordinates:
+            return coordinates
+        
+        digest = hashlib.blake2b(normalized.encode('utf-8'), digest_size=16).hexdigest()
+        cache_key = GEOCODE_KEY.format(digest=digest)
+        cached = cache_get(cache_key)
+        if cached is not None:
+            location = json.loads(cached)
+            coordinates = (location['lat'], location['lng'])
+            self._geocode_memo_set(normalized, coordinates)
+            return coordinates
+        
         try:
             geocode_result = self.gmaps.geocode(address)
             if geocode_result:
                 location = geocode_result[0]['geometry']['location']
-                return (location['lat'], location['lng'])
+                coordinates = (location['lat'], location['lng'])
+                # Failed lookups are not cached so they are retried next time
+                cache_set(cache_key, json.dumps({'lat': coordinates[0], 'lng': coordinates[1]}), GEOCODE_TTL)
+                self._geocode_memo_set(normalized, coordinates)
+                return coordinates
             return None
         except Exception as e:
             print(f"Geocoding error: {e}")
             return None
     
+    def _geocode_memo_get(self, address: str) -> Optional[Tuple[float, float]]:
+        """Return unexpired in-process coordinates for a normalized address"""
+        with self._geocode_lock:
+            entry = self._geocode_memo.get(address)
+            if entry is None:
+                return None
+            expires_at, coordinates = entry
+            if expires_at < time.monotonic():
+                del self._geocode_memo[address]
+                return None
+            self._geocode_memo.move_to_end(address)
+            return coordinates
+    
+    def _geocode_memo_set(self, address: str, coordinates: Tuple[float, float]):
+        """Remember coordinates for a normalized address, evicting the least recently used"""
+        with self._geocode_lock:
+            self._geocode_memo[address] = (time.monotonic() + GEOCODE_TTL, coordinates)
+            self._geocode_memo.move_to_end(address)
+            if len(self._geocode_memo) > GEOCODE_MEMO_SIZE:
+                self._geocode_memo.popitem(last=False)
+    
     def _mock_geocode(self, address: str) -> Tuple[float, float]:
         """Mock geocoding for demo purposes"""
         # Return coordinates for major Indian cities based on address keywords
@@ -88,22 +294,25 @@ class LocationService:
             return self._mock_nearby_doctors(lat, lng, radius, specialty, limit)
         
         try:
-            # Search for hospitals and eye clinics
-            places_result = self.gmaps.places_nearby(
+            # Search for hospitals and eye clinics in the background
+            places_future = _google_executor.submit(
+                self.gmaps.places_nearby,
                 location=(lat, lng),
                 radius=radius * 1000,  # Convert km to meters
                 type='hospital',
                 keyword='eye doctor ophthalmologist'
             )
             
+            # Meanwhile search our database for registered doctors; this stays on
+            # the request thread, which holds the app context and session
+            db_doctors = self._find_registered_doctors(lat, lng, radius, specialty)
+            
+            places_result = places_future.result()
             doctors = []
             for place in places_result.get('results', [])[:limit]:
                 doctor_info = self._process_place_result(place, lat, lng)
                 if doctor_info:
                     doctors.append(doctor_info)
-            
-            # Also search our database for registered doctors
-            db_doctors = self._find_registered_doctors(lat, lng, radius, specialty)
             doctors.extend(db_doctors)
             
             # Sort by distance
@@ -124,12 +333,49 @@ class LocationService:
             # Calculate distance
             distance = self._calculate_distance(user_lat, user_lng, place_lat, place_lng)
             
-            # Get additional details
-            place_id = place['place_id']
+            # Only fields the Nearby Search already returns; phone, website and
+            # weekly hours are fetched per place by get_place_details
+            return {
+                'id': place['place_id'],
+                'name': place.get('name', 'Unknown'),
+                'type': 'hospital',
+                'specialization': 'General Ophthalmology',
+                'address': place.get('vicinity', ''),
+                'phone': '',
+                'website': '',
+                'rating': place.get('rating', 0),
+                'total_reviews': place.get('user_ratings_total', 0),
+                'distance': round(distance, 2),
+                'latitude': place_lat,
+                'longitude': place_lng,
+                'opening_hours': [],
+                'is_open_now': place.get('opening_hours', {}).get('open_now', None),
+                'source': 'google_places'
+            }
+            
+        except Exception as e:
+            print(f"Error processing place result: {e}")
+            return None
+    
+    def get_place_details(self, place_id: str) -> Optional[Dict]:
+        """
+        Get full details for a single Google Places listing
+        
+        Args:
+            place_id: Google Places place_id
+            
+        Returns:
+            Place information in the nearby search format, or None if unavailable
+        """
+        if not self.gmaps:
+            return None
+        
+        try:
             details = self.gmaps.place(place_id=place_id, fields=[
-                'name', 'formatted_address', 'formatted_phone_number',
-                'opening_hours', 'rating', 'reviews', 'website'
+                'name', 'formatted_address', 'formatted_phone_number', 'geometry',
+                'opening_hours', 'rating', 'user_ratings_total', 'website'
             ])['result']
+            location = details.get('geometry', {}).get('location', {})
             
             return {
                 'id': place_id,
@@ -140,64 +386,55 @@ class LocationService:
                 'phone': details.get('formatted_phone_number', ''),
                 'website': details.get('website', ''),
                 'rating': details.get('rating', 0),
-                'total_reviews': len(details.get('reviews', [])),
-                'distance': round(distance, 2),
-                'latitude': place_lat,
-                'longitude': place_lng,
+                'total_reviews': details.get('user_ratings_total', 0),
+                'latitude': location.get('lat'),
+                'longitude': location.get('lng'),
                 'opening_hours': details.get('opening_hours', {}).get('weekday_text', []),
                 'is_open_now': details.get('opening_hours', {}).get('open_now', None),
                 'source': 'google_places'
             }
             
         except Exception as e:
-            print(f"Error processing place result: {e}")
+            print(f"Error getting place details: {e}")
             return None
     
     def _find_registered_doctors(self, lat: float, lng: float, radius: int, specialty: str) -> List[Dict]:
         """Find doctors registered in our database"""
         try:
             # Query doctors within radius
-            doctors = db.session.query(DoctorProfile, User).join(
-                User, DoctorProfile.user_id == User.id
-            ).filter(
-                User.role == UserRole.DOCTOR,
-                User.is_active == True
-            ).all()
+            if self._has_clinic_geography():
+                doctors = self._query_doctors_within_postgis(lat, lng, radius)
+            else:
+                doctors = self._query_doctors_within(lat, lng, radius)
             
             registered_doctors = []
-            for doctor_profile, user in doctors:
-                if doctor_profile.clinic_lat and doctor_profile.clinic_lng:
-                    distance = self._calculate_distance(
-                        lat, lng, doctor_profile.clinic_lat, doctor_profile.clinic_lng
-                    )
-                    
-                    if distance <= radius:
-                        # Filter by specialty if specified
-                        if specialty and specialty.lower() not in doctor_profile.specialization.lower():
-                            continue
-                        
-                        doctor_info = {
-                            'id': f"db_{doctor_profile.id}",
-                            'name': f"Dr. {user.first_name} {user.last_name}",
-                            'type': 'doctor',
-                            'specialization': doctor_profile.specialization,
-                            'experience_years': doctor_profile.experience_years,
-                            'qualifications': doctor_profile.qualifications,
-                            'clinic_name': doctor_profile.clinic_name,
-                            'address': doctor_profile.clinic_address,
-                            'phone': user.phone,
-                            'consultation_fee': doctor_profile.consultation_fee,
-                            'rating': doctor_profile.rating,
-                            'total_reviews': doctor_profile.total_reviews,
-                            'distance': round(distance, 2),
-                            'latitude': doctor_profile.clinic_lat,
-                            'longitude': doctor_profile.clinic_lng,
-                            'is_verified': doctor_profile.is_verified,
-                            'services_offered': doctor_profile.services_offered,
-                            'available_slots': doctor_profile.available_slots,
-                            'source': 'registered_doctor'
-                        }
-                        registered_doctors.append(doctor_info)
+            for doctor_profile, user, distance in doctors:
+                # Filter by specialty if specified
+                if specialty and specialty.lower() not in doctor_profile.specialization.lower():
+                    continue
+                
+                doctor_info = {
+                    'id': f"db_{doctor_profile.id}",
+                    'name': f"Dr. {user.first_name} {user.last_name}",
+                    'type': 'doctor',
+                    'specialization': doctor_profile.specialization,
+                    'experience_years': doctor_profile.experience_years,
+                    'qualifications': doctor_profile.qualifications,
+                    'clinic_name': doctor_profile.clinic_name,
+                    'address': doctor_profile.clinic_address,
+                    'phone': user.phone,
+                    'consultation_fee': doctor_profile.consultation_fee,
+                    'rating': doctor_profile.rating,
+                    'total_reviews': doctor_profile.total_reviews,
+                    'distance': round(distance, 2),
+                    'latitude': doctor_profile.clinic_lat,
+                    'longitude': doctor_profile.clinic_lng,
+                    'is_verified': doctor_profile.is_verified,
+                    'services_offered': doctor_profile.services_offered,
+                    'available_slots': doctor_profile.available_slots,
+                    'source': 'registered_doctor'
+                }
+                registered_doctors.append(doctor_info)
             
             return registered_doctors
             
@@ -205,6 +442,84 @@ class LocationService:
             print(f"Error finding registered doctors: {e}")
             return []
     
+    def _has_clinic_geography(self) -> bool:
+        """Check whether doctor_profiles has the PostGIS clinic_geog column"""
+        if self._clinic_geography is None:
+            engine = db.engine
+            self._clinic_geography = engine.dialect.name == 'postgresql' and any(
+                column['name'] == 'clinic_geog'
+                for column in inspect(engine).get_columns('doctor_profiles')
+            )
+        return self._clinic_geography
+    
+    def _query_doctors_within_postgis(self, lat: float, lng: float, radius: int) -> List[Tuple]:
+        """
+        Find active doctors within radius using the clinic_geog GiST index
+        
+        Args:
+            lat: Latitude
+            lng: Longitude
+            radius: Search radius in kilometers
+            
+        Returns:
+            List of (DoctorProfile, User, distance in km), nearest first
+        """
+        point = func.geography(func.ST_SetSRID(func.ST_MakePoint(lng, lat), 4326))
+        distance_m = func.ST_Distance(CLINIC_GEOGRAPHY, point)
+        
+        # ST_DWithin prunes by the index before any distance is computed
+        rows = db.session.query(DoctorProfile, User, distance_m).join(
+            User, DoctorProfile.user_id == User.id
+        ).filter(
+            User.role == UserRole.DOCTOR,
+            User.is_active == True,
+            func.ST_DWithin(CLINIC_GEOGRAPHY, point, radius * 1000)
+        ).order_by(distance_m).all()
+        
+        return [(doctor_profile, user, meters / 1000) for doctor_profile, user, meters in rows]
+    
+    def _query_doctors_within(self, lat: float, lng: float, radius: int) -> List[Tuple]:
+        """
+        Find active doctors within radius on databases without PostGIS
+        
+        Args:
+            lat: Latitude
+            lng: Longitude
+            radius: Search radius in kilometers
+            
+        Returns:
+            List of (DoctorProfile, User, distance in km)
+        """
+        query = db.session.query(DoctorProfile, User).join(
+            User, DoctorProfile.user_id == User.id
+        ).filter(
+            User.role == UserRole.DOCTOR,
+            User.is_active == True
+        )
+        
+        # Only load the clinics the in-memory index places within radius
+        doctor_ids = doctor_index.ids_within(lat, lng, radius)
+        if not doctor_ids:
+            return []
+        query = query.filter(DoctorProfile.id.in_(doctor_ids))
+        
+        doctors = [
+            (doctor_profile, user) for doctor_profile, user in query.all()
+            if doctor_profile.clinic_lat and doctor_profile.clinic_lng
+        ]
+        if not doctors:
+            return []
+        
+        # Exact distance cut for every candidate in one vectorized call
+        lats = np.array([doctor_profile.clinic_lat for doctor_profile, _ in doctors])
+        lngs = np.array([doctor_profile.clinic_lng for doctor_profile, _ in doctors])
+        distances = haversine_vec(lat, lng, lats, lngs)
+        
+        return [
+            (doctors[i][0], doctors[i][1], float(distances[i]))
+            for i in np.flatnonzero(distances <= radius)
+        ]
+    
     def _mock_nearby_doctors(self, lat: float, lng: float, radius: int, specialty: str, limit: int) -> List[Dict]:
         """Generate mock doctor data for demo purposes"""
         mock_doctors = [
@@ -274,21 +589,7 @@ class LocationService:
     
     def _calculate_distance(self, lat1: float, lng1: float, lat2: float, lng2: float) -> float:
         """Calculate distance between two points using Haversine formula"""
-        import math
-        
-        # Convert latitude and longitude from degrees to radians
-        lat1, lng1, lat2, lng2 = map(math.radians, [lat1, lng1, lat2, lng2])
-        
-        # Haversine formula
-        dlat = lat2 - lat1
-        dlng = lng2 - lng1
-        a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlng/2)**2
-        c = 2 * math.asin(math.sqrt(a))
-        
-        # Radius of earth in kilometers
-        r = 6371
-        
-        return c * r
+        return haversine_km(float(lat1), float(lng1), float(lat2), float(lng2))
     
     def get_directions(self, origin: Tuple[float, float], destination: Tuple[float, float]) -> Dict:
         """Get driving directions between two points"""
@@ -0,0 +1,61 @@
+"""
+Database migration script to add a PostGIS geography column to doctor_profiles
+Run this script on PostgreSQL databases so nearby doctor searches can use a GiST index;
+SQLite databases keep using the plain clinic_lat/clinic_lng columns
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask
+from sqlalchemy import text
+from models import db
+
+# clinic_geog is generated from clinic_lng/clinic_lat, so it stays in sync on every write
+GEOGRAPHY_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS postgis",
+    """
+    ALTER TABLE doctor_profiles ADD COLUMN IF NOT EXISTS clinic_geog geography(Point, 4326)
+        GENERATED ALWAYS AS (
+            ST_SetSRID(ST_MakePoint(clinic_lng, clinic_lat), 4326)::geography
+        ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_doctor_geog ON doctor_profiles USING GIST (clinic_geog)",
+]
+
+def add_doctor_geography():
+    """Add the clinic_geog column and its GiST index to doctor_profiles"""
+    
+    # Initialize Flask app for database operations
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///dristi_ai.db')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    
+    # Initialize database
+    db.init_app(app)
+    
+    with app.app_context():
+        if db.engine.dialect.name != 'postgresql':
+            print("ℹ️ PostGIS is only available on PostgreSQL, skipping migration")
+            return True
+        
+        try:
+            print("🔄 Adding doctor_profiles.clinic_geog...")
+            
+            for statement in GEOGRAPHY_DDL:
+                db.session.execute(text(statement))
+            db.session.commit()
+            
+            print("✅ Column 'clinic_geog' and index 'idx_doctor_geog' are present")
+            print("\n🎉 Database migration completed!")
+            
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Error adding geography column: {str(e)}")
+            return False
+    
+    return True
+
+if __name__ == "__main__":
+    add_doctor_geography()
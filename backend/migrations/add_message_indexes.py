@@ -0,0 +1,41 @@
+"""
+Database migration script to add indexes to the messages table
+Run this script on databases created before the indexes were added to the Message model
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask
+from models import db, Message
+
+def add_message_indexes():
+    """Create the Message model indexes that are missing from the database"""
+    
+    # Initialize Flask app for database operations
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///dristi_ai.db')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    
+    # Initialize database
+    db.init_app(app)
+    
+    with app.app_context():
+        try:
+            print("🔄 Adding message indexes...")
+            
+            for index in Message.__table__.indexes:
+                index.create(bind=db.engine, checkfirst=True)
+                print(f"✅ Index '{index.name}' is present")
+            
+            print("\n🎉 Database migration completed!")
+            
+        except Exception as e:
+            print(f"❌ Error creating indexes: {str(e)}")
+            return False
+    
+    return True
+
+if __name__ == "__main__":
+    add_message_indexes()
@@ -1,10 +1,38 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
+from argon2 import PasswordHasher
+from argon2.exceptions import VerifyMismatchError, InvalidHashError
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from datetime import datetime
 import enum
+import sqlite3
 
 db = SQLAlchemy()
 bcrypt = Bcrypt()
+# New passwords are hashed with argon2id; bcrypt hashes are still verified
+# and upgraded on the next successful login
+password_hasher = PasswordHasher(time_cost=2, memory_cost=65536, parallelism=1)
+
+# Applied to every new SQLite connection, from the app and the init scripts
+# alike: WAL lets readers run during a write, and the larger page cache and
+# memory map keep hot pages out of the filesystem path
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+)
+
+@event.listens_for(Engine, 'connect')
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
 
 class UserRole(enum.Enum):
     PATIENT = "patient"
@@ -43,9 +71,9 @@ class User(db.Model):
     __tablename__ = 'users'
 
     id = db.Column(db.Integer, primary_key=True)
-    email = db.Column(db.String(120), unique=True, nullable=True)  # Made nullable for wallet auth
+    email = db.Column(db.String(120), nullable=True)  # Made nullable for wallet auth
     password_hash = db.Column(db.String(128), nullable=True)  # Made nullable for wallet auth
-    wallet_address = db.Column(db.String(42), unique=True, nullable=True)  # Ethereum address
+    wallet_address = db.Column(db.String(42), nullable=True)  # Ethereum address
     first_name = db.Column(db.String(80), nullable=True)  # Made nullable for wallet auth
     last_name = db.Column(db.String(80), nullable=True)  # Made nullable for wallet auth
     phone = db.Column(db.String(20))
@@ -59,11 +87,22 @@ class User(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_login = db.Column(db.DateTime)
 
+    __table_args__ = (
+        # Unique partial indexes: wallet-only accounts have no email and
+        # email accounts have no wallet, so the NULLs are left out
+        db.Index('ix_users_email', 'email', unique=True,
+                 postgresql_where=(email.isnot(None)),
+                 sqlite_where=(email.isnot(None))),
+        db.Index('ix_users_wallet_address', 'wallet_address', unique=True,
+                 postgresql_where=(wallet_address.isnot(None)),
+                 sqlite_where=(wallet_address.isnot(None))),
+    )
+
     def __init__(self, email=None, password=None, first_name=None, last_name=None, wallet_address=None, role=UserRole.PATIENT, **kwargs):
         self.email = email
         self.wallet_address = wallet_address
         if password:
-            self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+            self.password_hash = password_hasher.hash(password)
         self.first_name = first_name
         self.last_name = last_name
         self.role = role
@@ -77,7 +116,21 @@ class User(db.Model):
     def check_password(self, password):
         if not self.password_hash:
             return False
-        return bcrypt.check_password_hash(self.password_hash, password)
+
+        if self.password_hash.startswith('$argon2'):
+            try:
+                password_hasher.verify(self.password_hash, password)
+            except (VerifyMismatchError, InvalidHashError):
+                return False
+            if password_hasher.check_needs_rehash(self.password_hash):
+                self.password_hash = password_hasher.hash(password)
+            return True
+
+        # Legacy bcrypt hash; rehash with argon2id once the password is known
+        if not bcrypt.check_password_hash(self.password_hash, password):
+            return False
+        self.password_hash = password_hasher.hash(password)
+        return True
 
     def to_dict(self):
         return {
@@ -114,26 +167,37 @@ class FamilyMember(db.Model):
 
     user = db.relationship('User', backref=db.backref('family_members', lazy=True))
 
-    def to_dict(self):
+    @classmethod
+    def dict_columns(cls):
+        """Columns row_to_dict reads, for read-only selects that skip the ORM"""
+        return (cls.id, cls.user_id, cls.name, cls.relationship, cls.date_of_birth,
+                cls.gender, cls.phone, cls.medical_conditions, cls.created_at)
+
+    @classmethod
+    def row_to_dict(cls, row):
+        """Serialize a FamilyMember, or a row selected with dict_columns()"""
         return {
-            'id': self.id,
-            'user_id': self.user_id,
-            'name': self.name,
-            'relationship': self.relationship.value,
-            'date_of_birth': self.date_of_birth.isoformat() if self.date_of_birth else None,
-            'gender': self.gender.value if self.gender else None,
-            'phone': self.phone,
-            'medical_conditions': self.medical_conditions,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'id': row.id,
+            'user_id': row.user_id,
+            'name': row.name,
+            'relationship': row.relationship.value,
+            'date_of_birth': row.date_of_birth.isoformat() if row.date_of_birth else None,
+            'gender': row.gender.value if row.gender else None,
+            'phone': row.phone,
+            'medical_conditions': row.medical_conditions,
+            'created_at': row.created_at.isoformat() if row.created_at else None
         }
 
+    def to_dict(self):
+        return self.row_to_dict(self)
+
 # Enhanced Test Results Model
 class TestResult(db.Model):
     __tablename__ = 'test_results'
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    family_member_id = db.Column(db.Integer, db.ForeignKey('family_members.id'), nullable=True)
+    family_member_id = db.Column(db.Integer, db.ForeignKey('family_members.id', ondelete='CASCADE'), nullable=True)
     test_type = db.Column(db.String(50), nullable=False)  # 'eye_disease', 'color_blindness', 'vision_test', 'power_analysis'
     test_date = db.Column(db.DateTime, default=datetime.utcnow)
     results = db.Column(db.JSON, nullable=False)
@@ -141,6 +205,11 @@ class TestResult(db.Model):
     image_url = db.Column(db.String(255))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # Latest results per user and family member, newest first
+        db.Index('ix_test_results_user_member_created', 'user_id', 'family_member_id', 'created_at'),
+    )
+
     user = db.relationship('User', backref=db.backref('test_results', lazy=True))
     family_member = db.relationship('FamilyMember', backref=db.backref('test_results', lazy=True))
 
@@ -163,7 +232,7 @@ class AIAnalysis(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    family_member_id = db.Column(db.Integer, db.ForeignKey('family_members.id'), nullable=True)
+    family_member_id = db.Column(db.Integer, db.ForeignKey('family_members.id', ondelete='CASCADE'), nullable=True)
     image_url = db.Column(db.String(255), nullable=False)
     predicted_condition = db.Column(db.String(100), nullable=False)
     confidence_score = db.Column(db.Float, nullable=False)
@@ -172,6 +241,11 @@ class AIAnalysis(db.Model):
     follow_up_required = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # Latest analyses per user and family member, newest first
+        db.Index('ix_ai_analysis_user_member_created', 'user_id', 'family_member_id', 'created_at'),
+    )
+
     user = db.relationship('User', backref=db.backref('ai_analyses', lazy=True))
     family_member = db.relationship('FamilyMember', backref=db.backref('ai_analyses', lazy=True))
 
@@ -387,6 +461,15 @@ class Message(db.Model):
     is_read = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # Partial index over only the unread rows, for unread counts per recipient
+        db.Index('ix_messages_recipient_unread', 'recipient_id',
+                 postgresql_where=(is_read == False),
+                 sqlite_where=(is_read == False)),
+        # Conversation lookups by appointment in chronological order
+        db.Index('ix_messages_appointment_created', 'appointment_id', 'created_at'),
+    )
+
     sender = db.relationship('User', foreign_keys=[sender_id], backref='sent_messages')
     recipient = db.relationship('User', foreign_keys=[recipient_id], backref='received_messages')
     appointment = db.relationship('Appointment', backref='messages')
@@ -409,7 +492,7 @@ class VisionTest(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    family_member_id = db.Column(db.Integer, db.ForeignKey('family_members.id'), nullable=True)
+    family_member_id = db.Column(db.Integer, db.ForeignKey('family_members.id', ondelete='CASCADE'), nullable=True)
     test_date = db.Column(db.DateTime, default=datetime.utcnow)
 
     # Vision scores
@@ -430,6 +513,11 @@ class VisionTest(db.Model):
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # Latest vision tests per user and family member, newest first
+        db.Index('ix_vision_tests_user_member_created', 'user_id', 'family_member_id', 'created_at'),
+    )
+
     user = db.relationship('User', backref=db.backref('vision_tests', lazy=True))
     family_member = db.relationship('FamilyMember', backref=db.backref('vision_tests', lazy=True))
 
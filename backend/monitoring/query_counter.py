@@ -0,0 +1,31 @@
+"""
+SQL query counter for spotting N+1 regressions
+Records every statement executed while the context is active, e.g.
+
+    with app.test_client() as client, capture_queries() as queries:
+        client.get('/api/family/dashboard', headers=auth_headers)
+    assert len(queries) <= 3, queries
+"""
+
+from contextlib import contextmanager
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+@contextmanager
+def capture_queries():
+    """
+    Capture the SQL statements executed on any engine inside the block
+
+    Yields:
+        list: Executed SQL strings, in order; filled in as the block runs
+    """
+    queries = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        queries.append(statement)
+
+    event.listen(Engine, 'before_cursor_execute', record)
+    try:
+        yield queries
+    finally:
+        event.remove(Engine, 'before_cursor_execute', record)
@@ -0,0 +1,71 @@
+"""
+Shared Redis cache helpers
+Caching is enabled only when REDIS_URL is set and the redis package is installed;
+otherwise every helper is a no-op and callers take the uncached path
+"""
+
+import os
+import logging
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# Errors a cache call can raise; callers fall back to the uncached path
+CACHE_ERRORS = (redis.RedisError,) if redis is not None else ()
+
+# Cached family dashboard response body per user
+FAMILY_DASHBOARD_KEY = "family_dashboard:{user_id}"
+FAMILY_DASHBOARD_TTL = 30
+
+# Geocoded coordinates per normalized address digest
+GEOCODE_KEY = "geocode:{digest}"
+GEOCODE_TTL = 24 * 60 * 60
+
+_client = None
+
+def get_redis():
+    """Return the shared Redis client, or None if caching is not configured"""
+    global _client
+    redis_url = os.getenv('REDIS_URL')
+    if _client is None and redis is not None and redis_url:
+        _client = redis.Redis.from_url(redis_url)
+    return _client
+
+def cache_get(key):
+    """Return the cached bytes for key, or None on a miss or cache failure"""
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        return client.get(key)
+    except CACHE_ERRORS:
+        logger.warning("Cache read failed for %s", key)
+        return None
+
+def cache_set(key, value, ttl):
+    """Store value under key for ttl seconds, ignoring cache failures"""
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        client.setex(key, ttl, value)
+    except CACHE_ERRORS:
+        logger.warning("Cache write failed for %s", key)
+
+def cache_delete(key):
+    """Remove key from the cache, ignoring cache failures"""
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        client.delete(key)
+    except CACHE_ERRORS:
+        logger.warning("Cache delete failed for %s", key)
+
+def invalidate_family_dashboard(user_id):
+    """Drop a user's cached family dashboard after their family data changes"""
+    cache_delete(FAMILY_DASHBOARD_KEY.format(user_id=user_id))
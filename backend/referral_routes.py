@@ -15,6 +15,14 @@ def _generate_code() -> str:
     return secrets.token_hex(5)
 
 
+def _users_by_ids(ids) -> dict:
+    # Fetch all users in one IN query instead of one query per id
+    unique_ids = list(set(ids))
+    if not unique_ids:
+        return {}
+    return {u.id: u for u in User.query.filter(User.id.in_(unique_ids)).all()}
+
+
 @referral_bp.route('/my-code', methods=['GET'])
 @jwt_required(optional=True)
 def my_code():
@@ -104,10 +112,11 @@ def stats():
     conversions = sum(1 for r in refs if r.converted_at)
     total_rewards = float(sum(r.reward_amount or 0 for r in refs))
 
+    users = _users_by_ids(r.referred_user_id for r in refs if r.referred_user_id)
     referred_users = []
     for r in refs:
         if r.referred_user_id:
-            user = User.query.get(r.referred_user_id)
+            user = users.get(r.referred_user_id)
             if user:
                 referred_users.append({
                     'id': user.id,
@@ -148,12 +157,14 @@ def leaderboard():
             by_user[r.referrer_user_id]['conversions'] += 1
 
     # Fetch user names
+    users = _users_by_ids(by_user.keys())
     rows = []
     for uid, agg in by_user.items():
-        user = User.query.get(uid)
+        user = users.get(uid)
+        name = f"{(user.first_name or '')} {(user.last_name or '')}".strip() if user else ''
         rows.append({
             'user_id': uid,
-            'name': f"{(user.first_name or '')} {(user.last_name or '')}".strip() or f"User {uid}",
+            'name': name or f"User {uid}",
             'conversions': agg['conversions'],
             'clicks': agg['clicks']
         })
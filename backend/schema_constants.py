@@ -0,0 +1,12 @@
+"""
+Schema names shared by the models and the standalone database scripts
+Kept free of Flask and SQLAlchemy imports so sqlite3-only scripts can use it
+"""
+
+# (table, index) pairs for the composite indexes declared in models.py that the
+# family dashboard and health summary queries rely on; the init scripts check for them
+FAMILY_HISTORY_INDEXES = (
+    ('ai_analysis', 'ix_ai_analysis_user_member_created'),
+    ('test_results', 'ix_test_results_user_member_created'),
+    ('vision_tests', 'ix_vision_tests_user_member_created'),
+)
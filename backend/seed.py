@@ -0,0 +1,39 @@
+"""
+Seed data for fresh databases
+Shared by init_database.py and init_database_flask.py
+"""
+
+from models import db, User, UserRole, password_hasher
+
+# Users created on a fresh database. Add fixtures here; each distinct
+# password is hashed once no matter how many users share it
+SEED_USERS = [
+    {
+        'email': 'admin@dristi.ai',
+        'password': 'admin123',
+        'first_name': 'Admin',
+        'last_name': 'User',
+        'role': UserRole.ADMIN,
+        'phone': '+1234567890',
+        'preferred_language': 'en',
+        'is_active': True
+    },
+]
+
+def seed_users(users):
+    """
+    Bulk insert seed users with a single INSERT
+    
+    Args:
+        users: Dicts of User column values, with a plain 'password' instead of password_hash
+    """
+    hashes = {}
+    rows = []
+    for user in users:
+        row = dict(user)
+        password = row.pop('password')
+        if password not in hashes:
+            hashes[password] = password_hasher.hash(password)
+        row['password_hash'] = hashes[password]
+        rows.append(row)
+    db.session.execute(db.insert(User), rows)
@@ -0,0 +1,72 @@
+"""
+Auth route tests
+Checks that logging in upgrades stored password hashes to argon2id
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+from flask import Flask
+from flask_jwt_extended import JWTManager
+
+from models import db, bcrypt, User
+from auth_routes import auth_bp
+
+PASSWORD = 'Passw0rd-for-tests'
+
+@pytest.fixture
+def app():
+    """Auth blueprint on an in-memory SQLite database"""
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['JWT_SECRET_KEY'] = 'auth-route-test-secret-key-0123456789'
+
+    db.init_app(app)
+    bcrypt.init_app(app)
+    JWTManager(app)
+    app.register_blueprint(auth_bp)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def _stored_hash(user_id):
+    """Read the password hash from the database rather than the identity map"""
+    db.session.expunge_all()
+    return db.session.get(User, user_id).password_hash
+
+def test_login_persists_argon2_rehash_of_bcrypt_hash(app):
+    user = User(email='legacy@example.com', first_name='Legacy', last_name='User')
+    user.password_hash = bcrypt.generate_password_hash(PASSWORD).decode('utf-8')
+    db.session.add(user)
+    db.session.commit()
+    user_id = user.id
+    assert _stored_hash(user_id).startswith('$2b$')
+
+    response = app.test_client().post('/auth/login', json={
+        'email': 'legacy@example.com', 'password': PASSWORD
+    })
+
+    assert response.status_code == 200, response.get_json()
+    assert _stored_hash(user_id).startswith('$argon2id$')
+
+def test_failed_login_keeps_stored_hash(app):
+    original = bcrypt.generate_password_hash(PASSWORD).decode('utf-8')
+    user = User(email='legacy@example.com', first_name='Legacy', last_name='User')
+    user.password_hash = original
+    db.session.add(user)
+    db.session.commit()
+    user_id = user.id
+
+    response = app.test_client().post('/auth/login', json={
+        'email': 'legacy@example.com', 'password': 'wrong-password'
+    })
+
+    assert response.status_code == 401
+    assert _stored_hash(user_id) == original
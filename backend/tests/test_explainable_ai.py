@@ -0,0 +1,44 @@
+"""
+Grad-CAM explainer tests
+Checks that the heatmap graphs are traced once per model, not once per explainer
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pytest
+
+tf = pytest.importorskip('tensorflow')
+pytest.importorskip('cv2')
+pytest.importorskip('PIL')
+
+from explainable_ai import GradCAMExplainer
+
+@pytest.fixture
+def model():
+    """Small CNN with a convolutional layer for Grad-CAM to explain"""
+    return tf.keras.Sequential([
+        tf.keras.Input(shape=(32, 32, 3)),
+        tf.keras.layers.Conv2D(4, 3, activation='relu', name='conv'),
+        tf.keras.layers.GlobalAveragePooling2D(),
+        tf.keras.layers.Dense(3, activation='softmax'),
+    ])
+
+def test_heatmap_graph_is_not_retraced_across_explainers(model):
+    img_array = np.random.rand(1, 32, 32, 3).astype(np.float32)
+
+    first = GradCAMExplainer(model)
+    first.generate_heatmaps(img_array, [0, 1])
+    first.generate_heatmap(img_array, 0)
+
+    # A new explainer for the same model, as built on every cache miss
+    second = GradCAMExplainer(model)
+    results = second.generate_heatmaps(img_array, [2, 0])
+    second.generate_heatmap(img_array, 2)
+
+    assert all(result['success'] for result in results)
+    assert second._compute_heatmaps is first._compute_heatmaps
+    assert second._compute_heatmaps.experimental_get_tracing_count() == 1
+    assert second._compute_heatmap.experimental_get_tracing_count() == 1
@@ -0,0 +1,41 @@
+"""
+orjson JSON provider tests
+Checks responses match Flask's default provider, including values orjson cannot encode
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from datetime import datetime
+
+import pytest
+from flask import Flask, jsonify
+
+from json_provider import OrjsonProvider
+
+@pytest.fixture
+def app():
+    """App using the orjson provider"""
+    app = Flask(__name__)
+    app.json = OrjsonProvider(app)
+    return app
+
+def test_dumps_matches_default_provider(app):
+    payload = {'b': 1, 'a': [1.5, None, True], 3: 'x', 'when': datetime(2024, 1, 2, 3, 4, 5)}
+
+    assert app.json.loads(app.json.dumps(payload)) == {
+        'a': [1.5, None, True], 'b': 1, '3': 'x', 'when': 'Tue, 02 Jan 2024 03:04:05 GMT'
+    }
+
+def test_integers_past_64_bits_fall_back_to_json(app):
+    # 1000 tokens with 18 decimals, as a wei amount
+    wei = 1000 * 10 ** 18
+    assert wei >= 2 ** 64
+
+    assert app.json.dumps({'amount': wei, 'negative': -wei}) == \
+        f'{{"amount":{wei},"negative":{-wei}}}'
+    with app.test_request_context():
+        response = jsonify(amount=wei)
+    assert response.get_data() == f'{{"amount":{wei}}}\n'.encode()
+    assert response.get_json() == {'amount': wei}
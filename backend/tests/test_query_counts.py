@@ -0,0 +1,148 @@
+"""
+Query-count regression tests for the family routes
+Fails if the dashboard or health summary goes back to issuing queries per family member
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+
+import models
+from models import db, User, FamilyMember, RelationshipType, AIAnalysis, VisionTest
+from family_routes import family_bp, RECENT_RECORDS_LIMIT
+from monitoring.query_counter import capture_queries
+
+# Enough members and records per member that an N+1 would blow the budget,
+# and more records than the health summary shows
+FAMILY_SIZE = 4
+RECORDS_PER_MEMBER = RECENT_RECORDS_LIMIT + 1
+DASHBOARD_MAX_QUERIES = 3
+# One count query and one page query
+MEMBER_LIST_MAX_QUERIES = 2
+# The member and all of its recent records come back in a single query
+HEALTH_SUMMARY_QUERIES = 1
+
+@pytest.fixture
+def app():
+    """Family blueprint on an in-memory SQLite database"""
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['JWT_SECRET_KEY'] = 'query-count-test-secret-key-0123456789'
+
+    db.init_app(app)
+    JWTManager(app)
+    app.register_blueprint(family_bp)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def family(app):
+    """A user with several family members, each with a few health records"""
+    user = User(email='parent@example.com', first_name='Test', last_name='Parent')
+    db.session.add(user)
+    db.session.flush()
+
+    members = []
+    now = datetime.utcnow()
+    for i in range(FAMILY_SIZE):
+        member = FamilyMember(user_id=user.id, name=f'Member {i}', relationship=RelationshipType.CHILD)
+        db.session.add(member)
+        db.session.flush()
+        members.append(member)
+
+        for j in range(RECORDS_PER_MEMBER):
+            created_at = now - timedelta(days=j)
+            db.session.add(AIAnalysis(
+                user_id=user.id, family_member_id=member.id, image_url='test.jpg',
+                predicted_condition='normal', confidence_score=0.9,
+                follow_up_required=(j == 0), created_at=created_at
+            ))
+            # Referenced through the module so pytest does not collect it as a test class
+            db.session.add(models.TestResult(
+                user_id=user.id, family_member_id=member.id,
+                test_type='color_blindness', results={'score': j}, created_at=created_at
+            ))
+            db.session.add(VisionTest(
+                user_id=user.id, family_member_id=member.id,
+                od_vision_score='6/6', os_vision_score='6/6', created_at=created_at
+            ))
+
+    db.session.commit()
+    user_id = user.id
+    member_ids = [member.id for member in members]
+    # Start each request from an empty identity map, as a real request would
+    db.session.expunge_all()
+
+    token = create_access_token(identity=str(user_id))
+    return {
+        'headers': {'Authorization': f'Bearer {token}'},
+        'member_ids': member_ids
+    }
+
+def test_family_dashboard_query_count(app, family):
+    client = app.test_client()
+
+    with capture_queries() as queries:
+        response = client.get('/api/family/dashboard', headers=family['headers'])
+
+    assert response.status_code == 200, response.get_json()
+    dashboard = response.get_json()['dashboard']
+    assert dashboard['total_family_members'] == FAMILY_SIZE
+    assert len(dashboard['health_alerts']) == FAMILY_SIZE
+    assert len(queries) <= DASHBOARD_MAX_QUERIES, queries
+
+def test_family_member_health_summary_query_count(app, family):
+    client = app.test_client()
+    member_id = family['member_ids'][0]
+
+    with capture_queries() as queries:
+        response = client.get(f'/api/family/members/{member_id}/health-summary', headers=family['headers'])
+
+    assert response.status_code == 200, response.get_json()
+    health_summary = response.get_json()['health_summary']
+    assert health_summary['total_records'] == {
+        'ai_analyses': RECENT_RECORDS_LIMIT,
+        'test_results': RECENT_RECORDS_LIMIT,
+        'vision_tests': RECENT_RECORDS_LIMIT
+    }
+    # Newest first; the fixture records the age in days as the score
+    scores = [result['results']['score'] for result in health_summary['recent_test_results']]
+    assert scores == list(range(RECENT_RECORDS_LIMIT))
+    assert len(queries) == HEALTH_SUMMARY_QUERIES, queries
+
+def test_family_member_health_summary_of_another_users_member(app, family):
+    client = app.test_client()
+    other = User(email='other@example.com', first_name='Other', last_name='User')
+    db.session.add(other)
+    db.session.commit()
+    token = create_access_token(identity=str(other.id))
+
+    response = client.get(f'/api/family/members/{family["member_ids"][0]}/health-summary',
+                          headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == 404
+
+def test_family_member_list_query_count(app, family):
+    client = app.test_client()
+
+    with capture_queries() as queries:
+        response = client.get('/api/family/members', headers=family['headers'])
+
+    assert response.status_code == 200, response.get_json()
+    # The projected rows serialize exactly like the ORM objects
+    expected = [member.to_dict() for member in
+                FamilyMember.query.filter(FamilyMember.id.in_(family['member_ids'])).order_by(FamilyMember.id)]
+    assert response.get_json()['family_members'] == expected
+    assert len(queries) <= MEMBER_LIST_MAX_QUERIES, queries
@@ -0,0 +1,128 @@
+"""
+Web3 service tests
+Exercises the service against an in-process JSON-RPC provider or an unreachable node
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import asyncio
+
+import pytest
+from eth_abi import decode as abi_decode, encode as abi_encode
+from eth_utils import function_signature_to_4byte_selector
+from web3.providers.base import BaseProvider
+
+from blockchain_services.web3_service import Web3Service, MULTICALL3_ADDRESS
+
+TOKEN_ADDRESS = '0x' + '11' * 20
+RECIPIENT = '0x' + 'ab' * 20
+ACHIEVEMENT_ABI = [{
+    'inputs': [{'internalType': 'uint256', 'name': 'tokenId', 'type': 'uint256'}],
+    'name': 'getAchievement',
+    'outputs': [
+        {'internalType': 'uint8', 'name': 'achievementType', 'type': 'uint8'},
+        {'internalType': 'string', 'name': 'name', 'type': 'string'},
+        {'internalType': 'address', 'name': 'recipient', 'type': 'address'},
+    ],
+    'stateMutability': 'view',
+    'type': 'function',
+}]
+GET_ACHIEVEMENT = function_signature_to_4byte_selector('getAchievement(uint256)')
+AGGREGATE = function_signature_to_4byte_selector('aggregate((address,bytes)[])')
+
+class FakeNodeProvider(BaseProvider):
+    """Answers eth_call for the achievement contract and, optionally, Multicall3"""
+
+    def __init__(self, has_multicall: bool):
+        super().__init__()
+        self.has_multicall = has_multicall
+        self.calls = []
+
+    def _call_achievement(self, data: bytes) -> bytes:
+        assert data[:4] == GET_ACHIEVEMENT
+        (token_id,) = abi_decode(['uint256'], data[4:])
+        # Raw ABI encoding carries addresses in lowercase
+        return abi_encode(['uint8', 'string', 'address'], [token_id % 3, f'Badge {token_id}', RECIPIENT])
+
+    def make_request(self, method, params):
+        self.calls.append(method)
+        if method == 'eth_chainId':
+            result = '0x539'
+        elif method == 'eth_getCode':
+            result = '0x6001' if self.has_multicall else '0x'
+        elif method == 'eth_call':
+            to = params[0]['to'].lower()
+            data = bytes.fromhex(params[0]['data'][2:])
+            if to == MULTICALL3_ADDRESS.lower():
+                assert data[:4] == AGGREGATE
+                (calls,) = abi_decode(['(address,bytes)[]'], data[4:])
+                return_data = [self._call_achievement(call_data) for _, call_data in calls]
+                result = '0x' + abi_encode(['uint256', 'bytes[]'], [1, return_data]).hex()
+            else:
+                assert to == TOKEN_ADDRESS.lower()
+                result = '0x' + self._call_achievement(data).hex()
+        else:
+            raise AssertionError(f'Unexpected RPC method {method}')
+        return {'jsonrpc': '2.0', 'id': 1, 'result': result}
+
+@pytest.fixture(params=[True, False], ids=['multicall', 'per-call'])
+def service(request):
+    """Web3 service on a fake node, with and without Multicall3 deployed"""
+    service = Web3Service(provider_url='http://127.0.0.1:1')
+    service.w3.provider = FakeNodeProvider(has_multicall=request.param)
+    return service
+
+def test_batch_call_decodes_and_checksums_results(service):
+    contract = service.w3.eth.contract(address=service.w3.to_checksum_address(TOKEN_ADDRESS),
+                                       abi=ACHIEVEMENT_ABI)
+
+    results = service._batch_call(contract, 'getAchievement', [[1], [2], [5]])
+
+    checksummed = service.w3.to_checksum_address(RECIPIENT)
+    assert [list(result) for result in results] == [
+        [1, 'Badge 1', checksummed],
+        [2, 'Badge 2', checksummed],
+        [2, 'Badge 5', checksummed],
+    ]
+    # One aggregate eth_call with Multicall3, one eth_call per item without it
+    expected_calls = 1 if service.w3.provider.has_multicall else 3
+    assert service.w3.provider.calls.count('eth_call') == expected_calls
+
+def test_batch_call_with_no_arguments_skips_the_node(service):
+    contract = service.w3.eth.contract(address=service.w3.to_checksum_address(TOKEN_ADDRESS),
+                                       abi=ACHIEVEMENT_ABI)
+
+    assert service._batch_call(contract, 'getAchievement', []) == []
+    assert service.w3.provider.calls == []
+
+def test_batch_mint_falls_back_to_per_user_mints(monkeypatch, caplog):
+    # No DRSTCoin ABI is loaded, so batchReward is unavailable
+    service = Web3Service(provider_url='http://127.0.0.1:1', private_key='0x' + '01' * 32)
+    minted = []
+
+    def mint_drst_tokens(user_address, activity_type):
+        if activity_type == 'daily_exercise':
+            raise RuntimeError('Failed to mint DRST tokens: already rewarded today')
+        minted.append((user_address, activity_type))
+        return f'0x{len(minted):064x}'
+
+    monkeypatch.setattr(service, 'mint_drst_tokens', mint_drst_tokens)
+
+    with caplog.at_level('WARNING', logger='blockchain_services.web3_service'):
+        tx_hashes = service.batch_mint_drst_tokens(
+            [RECIPIENT, TOKEN_ADDRESS, RECIPIENT], ['eye_test', 'daily_exercise', 'family_member']
+        )
+
+    assert minted == [(RECIPIENT, 'eye_test'), (RECIPIENT, 'family_member')]
+    assert tx_hashes == [f'0x{1:064x}', f'0x{2:064x}']
+    assert 'no batchReward function' in caplog.text
+    assert 'Skipped daily_exercise reward' in caplog.text
+
+def test_async_reads_report_unreachable_node():
+    # Nothing listens on port 1, so aiohttp fails to connect
+    service = Web3Service(provider_url='http://127.0.0.1:1')
+
+    with pytest.raises(RuntimeError, match='Failed to get balance'):
+        asyncio.run(service.aget_balance(RECIPIENT))
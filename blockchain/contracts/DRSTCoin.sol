@@ -24,6 +24,9 @@ contract DRSTCoin is ERC20, ERC20Burnable, AccessControl, ReentrancyGuard, Pausa
     uint256 public constant DAILY_EXERCISE_REWARD = 5 * 10**18; // 5 DRST
     uint256 public constant FAMILY_MEMBER_REWARD = 20 * 10**18; // 20 DRST
     
+    // Activity types accepted by batchReward
+    enum Activity { EyeTest, DailyExercise, FamilyMember }
+    
     // Activity tracking
     mapping(address => uint256) public lastExerciseTime;
     mapping(address => uint256) public totalEyeTests;
@@ -38,6 +41,7 @@ contract DRSTCoin is ERC20, ERC20Burnable, AccessControl, ReentrancyGuard, Pausa
     event RewardMinted(address indexed user, uint256 amount, string activityType);
     event DiscountApplied(address indexed user, uint256 tokensSpent, uint256 discountPercent);
     event TokensRedeemed(address indexed user, uint256 amount, string purpose);
+    event RewardSkipped(address indexed user, Activity activity, string reason);
     
     // Modifiers
     modifier validAddress(address addr) {
@@ -45,14 +49,6 @@ contract DRSTCoin is ERC20, ERC20Burnable, AccessControl, ReentrancyGuard, Pausa
         _;
     }
     
-    modifier onlyOncePerDay(address user) {
-        require(
-            block.timestamp >= lastExerciseTime[user] + 1 days,
-            "Daily exercise already completed"
-        );
-        _;
-    }
-    
     /**
      * @dev Constructor initializes the token with roles
      */
@@ -70,14 +66,10 @@ contract DRSTCoin is ERC20, ERC20Burnable, AccessControl, ReentrancyGuard, Pausa
     function rewardEyeTest(address user)
         external
         onlyRole(MINTER_ROLE)
-        validAddress(user)
         whenNotPaused
         nonReentrant
     {
-        _mint(user, EYE_TEST_REWARD);
-        totalEyeTests[user]++;
-        
-        emit RewardMinted(user, EYE_TEST_REWARD, "eye_test");
+        _rewardEyeTest(user);
     }
     
     /**
@@ -87,16 +79,10 @@ contract DRSTCoin is ERC20, ERC20Burnable, AccessControl, ReentrancyGuard, Pausa
     function rewardDailyExercise(address user)
         external
         onlyRole(MINTER_ROLE)
-        validAddress(user)
         whenNotPaused
-        onlyOncePerDay(user)
         nonReentrant
     {
-        _mint(user, DAILY_EXERCISE_REWARD);
-        lastExerciseTime[user] = block.timestamp;
-        totalExercises[user]++;
-        
-        emit RewardMinted(user, DAILY_EXERCISE_REWARD, "daily_exercise");
+        _rewardDailyExercise(user);
     }
     
     /**
@@ -106,10 +92,68 @@ contract DRSTCoin is ERC20, ERC20Burnable, AccessControl, ReentrancyGuard, Pausa
     function rewardFamilyMember(address user)
         external
         onlyRole(MINTER_ROLE)
-        validAddress(user)
         whenNotPaused
         nonReentrant
     {
+        _rewardFamilyMember(user);
+    }
+    
+    /**
+     * @dev Reward many users in one transaction
+     * @notice Entries that cannot be rewarded are skipped with a RewardSkipped
+     *         event instead of reverting the whole batch
+     * @param users Addresses of the users to reward
+     * @param activities Activity completed by each user
+     */
+    function batchReward(address[] calldata users, Activity[] calldata activities)
+        external
+        onlyRole(MINTER_ROLE)
+        whenNotPaused
+        nonReentrant
+    {
+        require(users.length == activities.length, "Length mismatch");
+        
+        for (uint256 i = 0; i < users.length; i++) {
+            address user = users[i];
+            Activity activity = activities[i];
+            
+            if (user == address(0)) {
+                emit RewardSkipped(user, activity, "invalid_address");
+            } else if (activity == Activity.EyeTest) {
+                _rewardEyeTest(user);
+            } else if (activity == Activity.DailyExercise) {
+                if (_exerciseRewardedToday(user)) {
+                    emit RewardSkipped(user, activity, "daily_exercise_already_completed");
+                } else {
+                    _rewardDailyExercise(user);
+                }
+            } else {
+                _rewardFamilyMember(user);
+            }
+        }
+    }
+    
+    function _exerciseRewardedToday(address user) internal view returns (bool) {
+        return block.timestamp < lastExerciseTime[user] + 1 days;
+    }
+    
+    function _rewardEyeTest(address user) internal validAddress(user) {
+        _mint(user, EYE_TEST_REWARD);
+        totalEyeTests[user]++;
+        
+        emit RewardMinted(user, EYE_TEST_REWARD, "eye_test");
+    }
+    
+    function _rewardDailyExercise(address user) internal validAddress(user) {
+        require(!_exerciseRewardedToday(user), "Daily exercise already completed");
+        _mint(user, DAILY_EXERCISE_REWARD);
+        lastExerciseTime[user] = block.timestamp;
+        totalExercises[user]++;
+        
+        emit RewardMinted(user, DAILY_EXERCISE_REWARD, "daily_exercise");
+    }
+    
+    function _rewardFamilyMember(address user) internal validAddress(user) {
         _mint(user, FAMILY_MEMBER_REWARD);
         familyMembersAdded[user]++;
         
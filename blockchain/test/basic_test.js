@@ -71,6 +71,31 @@ describe("Basic Smart Contract Tests", function () {
       expect(balance).to.equal(amount);
     });
 
+    it("Should reward several users in one batch", async function () {
+      await drstCoin.batchReward([owner.address, user1.address], [0, 2]);
+      expect(await drstCoin.totalEyeTests(owner.address)).to.equal(1);
+      expect(await drstCoin.balanceOf(user1.address)).to.equal(ethers.parseEther("20"));
+    });
+
+    it("Should skip unrewardable entries in a batch without reverting", async function () {
+      await drstCoin.rewardDailyExercise(user1.address);
+      
+      const tx = await drstCoin.batchReward(
+        [ethers.ZeroAddress, user1.address, owner.address, charity.address],
+        [0, 1, 0, 1]
+      );
+      await expect(tx).to.emit(drstCoin, "RewardSkipped")
+        .withArgs(ethers.ZeroAddress, 0, "invalid_address");
+      await expect(tx).to.emit(drstCoin, "RewardSkipped")
+        .withArgs(user1.address, 1, "daily_exercise_already_completed");
+      
+      // The valid entries are still rewarded
+      expect(await drstCoin.totalEyeTests(owner.address)).to.equal(1);
+      expect(await drstCoin.totalExercises(charity.address)).to.equal(1);
+      expect(await drstCoin.totalExercises(user1.address)).to.equal(1);
+      expect(await drstCoin.balanceOf(user1.address)).to.equal(ethers.parseEther("5"));
+    });
+
     it("Should allow owner to mint VSC tokens", async function () {
       const amount = ethers.parseEther("50");
       await visionCoin.mint(user1.address, amount);
@@ -151,7 +151,8 @@ export default function HeatmapVisualization({
     link.href = selectedView === 'heatmap' ? currentExplanation.heatmap_base64 
                : selectedView === 'overlay' ? currentExplanation.overlay_base64 
                : originalImage
-    link.download = `${selectedClass}_${selectedView}_explanation.png`
+    const extension = link.href.startsWith('data:image/jpeg') ? 'jpg' : 'png'
+    link.download = `${selectedClass}_${selectedView}_explanation.${extension}`
     document.body.appendChild(link)
     link.click()
     document.body.removeChild(link)